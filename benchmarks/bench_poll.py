@@ -0,0 +1,261 @@
+"""Poll-cycle benchmarks for RecomModbusHub against the local simulator.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_poll --cycles 50 --latency 0.005 --jitter 0.002
+
+Reports requests per cycle, cycle wall time, per-request latency (p50/p99),
+CPU time spent on the event loop per cycle and retries for sensor refresh,
+fan refresh and fan writes. ``--json`` writes the results for later runs to
+compare against with ``--baseline``.
+
+``--record`` logs the traffic of a run; ``--replay`` runs the hub against a
+log instead of the simulator, e.g. one recorded on a customer's unit with the
+"Record traffic" option, at original (``--speed 1``) or accelerated speed.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import tempfile
+import time
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.recom import RecomModbusHub
+from custom_components.recom.connection import acquire_connection
+from custom_components.recom.core.recorder import ReplayConnection, TrafficRecorder, load_records
+from custom_components.recom.const import (
+    DOMAIN,
+    SENSOR_TYPES,
+    ENTITY_SENSOR,
+    ENTITY_FAN,
+    FAN_NAME,
+    FAN_ON_OFF_ADDRESS,
+    FAN_SPEED_MODE_ADDRESS,
+    FAN_MANUAL_SPEED_ADDRESS,
+    FAN_POLL_TIER,
+    MODBUS_HOLDING_REGISTER,
+)
+
+from .simulator import Faults, RecomSimulator
+
+# Fan slider positions written per write cycle; coalesced into one write
+WRITES_PER_CYCLE = 10
+# The benchmark drives every read; keeps the hub's own poll timer out of the way
+SCAN_INTERVAL = 3600
+
+
+class BenchSensor:
+    """Just enough of RecomSensor for the hub."""
+
+    entity_type = ENTITY_SENSOR
+
+    def __init__(self, info):
+        self.name = info[0]
+        self.address = info[1]
+        self.divide_value_by = info[3]
+        self.modbus_type = info[4]
+        self.poll_tier = info[6]
+        self.updates = 0
+
+    def update_callback(self):
+        self.updates += 1
+
+
+class BenchFan:
+    """Just enough of RecomFanEntity for the hub."""
+
+    entity_type = ENTITY_FAN
+    name = FAN_NAME
+    on_off_address = FAN_ON_OFF_ADDRESS
+    speed_mode_address = FAN_SPEED_MODE_ADDRESS
+    manual_speed_address = FAN_MANUAL_SPEED_ADDRESS
+    poll_tier = FAN_POLL_TIER
+
+    def __init__(self):
+        self.updates = 0
+
+    def update_callback(self):
+        self.updates += 1
+
+
+class RequestTimer:
+    """Traffic recorder that counts and times every request the hub sends.
+
+    Requests are passed on to ``recorder`` (a TrafficRecorder) when given.
+    """
+
+    def __init__(self, recorder=None):
+        self._recorder = recorder
+        self.latencies = []
+        self.requests = 0
+        self.failures = 0
+
+    def record(self, method, args, kwargs, res, ms, lost=False):
+        self.latencies.append(ms / 1000)
+        self.requests += 1
+        if res is None or res.isError():
+            self.failures += 1
+        if self._recorder is not None:
+            self._recorder.record(method, args, kwargs, res, ms, lost)
+
+    def flush(self):
+        if self._recorder is not None:
+            self._recorder.flush()
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def _run_scenario(name, timer, sim, cycle, cycles):
+    timer.latencies.clear()
+    timer.requests = timer.failures = 0
+    if sim is not None:
+        sim.reset_counters()
+    walls = []
+    cpu = 0.0
+    for index in range(cycles):
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        await cycle(index)
+        walls.append(time.perf_counter() - start)
+        cpu += time.process_time() - cpu_start
+    # Every frame on the wire beyond what the hub asked for is a retry
+    wire_requests = sim.requests if sim is not None else timer.requests
+    return {
+        "scenario": name,
+        "cycles": cycles,
+        "requests_per_cycle": timer.requests / cycles,
+        "wire_requests_per_cycle": wire_requests / cycles,
+        "cycle_p50_ms": 1000 * _percentile(walls, 50),
+        "cycle_p99_ms": 1000 * _percentile(walls, 99),
+        "cycle_mean_ms": 1000 * statistics.fmean(walls),
+        "request_p50_ms": 1000 * _percentile(timer.latencies, 50),
+        "request_p99_ms": 1000 * _percentile(timer.latencies, 99),
+        "cpu_ms_per_cycle": 1000 * cpu / cycles,
+        "retries": max(0, wire_requests - timer.requests),
+        "failures": timer.failures,
+    }
+
+
+async def run(args):
+    config_dir = tempfile.mkdtemp()
+    hass = HomeAssistant(config_dir)
+    hass.data[DOMAIN] = {}
+    sim = None
+    if args.replay:
+        connection = ReplayConnection(load_records(args.replay), args.speed)
+        connection.users += 1
+    else:
+        faults = Faults(args.latency, args.jitter, args.drop_rate, args.exception_rate, args.serial_only)
+        sim = RecomSimulator(faults=faults, seed=args.seed)
+        port = await sim.start()
+        connection = acquire_connection(hass, "127.0.0.1", port, args.pipeline_window)
+    timer = RequestTimer(TrafficRecorder(args.record, float("inf"), 0) if args.record else None)
+    hub = RecomModbusHub(hass, "bench", connection, 1, SCAN_INTERVAL, args.max_read_gap, recorder=timer)
+    fan = BenchFan()
+    sensors = [BenchSensor(info) for info in SENSOR_TYPES.values()]
+    for entity in (*sensors, fan):
+        hub.async_add_entity(entity, entity.update_callback)
+    await hub.connect()
+    sensor_names = frozenset(sensor.name for sensor in sensors)
+
+    async def sensor_cycle(_index):
+        await hub.async_poll(sensor_names)
+
+    async def fan_cycle(_index):
+        await hub.async_poll({fan.name})
+
+    async def write_cycle(index):
+        for step in range(WRITES_PER_CYCLE):
+            hub.queue_write(fan, MODBUS_HOLDING_REGISTER, FAN_MANUAL_SPEED_ADDRESS, (index + step) % 100)
+        await hub.async_flush_writes()
+
+    results = []
+    try:
+        for name, cycle in (("sensor", sensor_cycle), ("fan", fan_cycle), ("write", write_cycle)):
+            results.append(await _run_scenario(name, timer, sim, cycle, args.cycles))
+    finally:
+        await hub.close()
+        if sim is not None:
+            await sim.stop()
+    return results
+
+
+def _print(results):
+    columns = (
+        ("scenario", "{:<8}"),
+        ("requests_per_cycle", "{:>8.1f}"),
+        ("cycle_p50_ms", "{:>9.2f}"),
+        ("cycle_p99_ms", "{:>9.2f}"),
+        ("request_p50_ms", "{:>9.2f}"),
+        ("request_p99_ms", "{:>9.2f}"),
+        ("cpu_ms_per_cycle", "{:>8.2f}"),
+        ("retries", "{:>7}"),
+        ("failures", "{:>8}"),
+    )
+    print("  ".join(f"{name[:9]:>9}" if i else f"{name:<8}" for i, (name, _) in enumerate(columns)))
+    for result in results:
+        print("  ".join(fmt.format(result[name]) for name, fmt in columns))
+
+
+def _regressions(results, baseline, tolerance):
+    """Compare against an earlier --json run; return human readable findings."""
+    previous = {result["scenario"]: result for result in baseline}
+    findings = []
+    for result in results:
+        old = previous.get(result["scenario"])
+        if old is None:
+            continue
+        if result["requests_per_cycle"] > old["requests_per_cycle"]:
+            findings.append(
+                f"{result['scenario']}: requests per cycle {old['requests_per_cycle']:.1f} -> {result['requests_per_cycle']:.1f}"
+            )
+        if result["cycle_p50_ms"] > old["cycle_p50_ms"] * (1 + tolerance):
+            findings.append(
+                f"{result['scenario']}: cycle p50 {old['cycle_p50_ms']:.2f} ms -> {result['cycle_p50_ms']:.2f} ms"
+            )
+    return findings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cycles", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.005, help="one-way delay added per request (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- random delay (s)")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="share of requests that drop the connection")
+    parser.add_argument("--exception-rate", type=float, default=0.0, help="share of requests answered with an exception")
+    parser.add_argument("--serial-only", action="store_true", help="simulate a gateway that can't pipeline")
+    parser.add_argument("--pipeline-window", type=int, default=1)
+    parser.add_argument("--max-read-gap", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--record", help="log the hub's requests and responses to this file")
+    parser.add_argument("--replay", help="answer requests from this traffic log instead of the simulator")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed-up of recorded latencies (0 = no wait)")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="fail if results regress against this --json file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed cycle time regression (share)")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+    _print(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            findings = _regressions(results, json.load(fh), args.tolerance)
+        for finding in findings:
+            print(f"REGRESSION {finding}", file=sys.stderr)
+        return 1 if findings else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
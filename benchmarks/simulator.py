@@ -0,0 +1,225 @@
+"""Local RECOM unit simulator.
+
+A pymodbus TCP server holds the register map from ``const.py``. Clients talk
+to a small proxy in front of it, which can add latency and jitter, drop
+connections, answer with Modbus exception responses instead of forwarding
+and behave like a gateway that can't pipeline.
+"""
+import asyncio
+import random
+import socket
+import struct
+from collections import Counter
+from dataclasses import dataclass
+
+from pymodbus.datastore import ModbusSequentialDataBlock, ModbusServerContext
+from pymodbus.server import ModbusTcpServer
+
+try:  # pymodbus >= 3.10
+    from pymodbus.datastore import ModbusDeviceContext
+except ImportError:
+    from pymodbus.datastore import ModbusSlaveContext as ModbusDeviceContext
+
+from custom_components.recom.const import (
+    SENSOR_TYPES,
+    FAN_ON_OFF_ADDRESS,
+    FAN_SPEED_MODE_ADDRESS,
+    FAN_MANUAL_SPEED_ADDRESS,
+    REVOLUTIONS_PER_MINUTE,
+    UnitOfTemperature,
+    VOLT,
+)
+
+# MBAP header: transaction id, protocol id, length, unit id
+_MBAP = struct.Struct(">HHHB")
+# Exception code answered for injected failures: slave device failure
+_EXCEPTION_CODE = 0x04
+_REGISTER_SPACE = 128
+
+
+def default_input_registers():
+    """Plausible raw values for every input register in SENSOR_TYPES."""
+    values = {}
+    for key, info in SENSOR_TYPES.items():
+        address, unit = info[1], info[2]
+        if unit == UnitOfTemperature.CELSIUS:
+            values[address] = 180 + 5 * address
+        elif unit == REVOLUTIONS_PER_MINUTE:
+            values[address] = 1450 + address
+        elif unit == VOLT:
+            values[address] = 3012
+        else:
+            values[address] = 42
+    return values
+
+
+def default_holding_registers():
+    return {FAN_SPEED_MODE_ADDRESS: 255, FAN_MANUAL_SPEED_ADDRESS: 55}
+
+
+def default_coils():
+    return {FAN_ON_OFF_ADDRESS: True}
+
+
+def _block(values, fill):
+    data = [fill] * _REGISTER_SPACE
+    for address, value in values.items():
+        data[address] = value
+    # Data blocks are 1-based: block address 1 is protocol address 0
+    return ModbusSequentialDataBlock(1, data)
+
+
+def _free_port(host):
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+@dataclass
+class Faults:
+    """Faults the proxy injects into every request."""
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    drop_rate: float = 0.0
+    exception_rate: float = 0.0
+    # Lose requests sent while another one is unanswered (no pipelining)
+    serial_only: bool = False
+
+
+class RecomSimulator:
+    """pymodbus server with the RECOM register map behind a fault-injecting proxy."""
+
+    def __init__(self, host="127.0.0.1", port=0, faults=None, seed=None):
+        self.host = host
+        self.port = port
+        self.faults = faults or Faults()
+        self._rng = random.Random(seed)
+        self._server = None
+        self._proxy = None
+        self._upstream_port = None
+        self._tasks = set()
+        self._writers = set()
+        self.requests = 0
+        self.function_codes = Counter()
+        self.connections = 0
+        self.dropped = 0
+        self.exceptions = 0
+        self.ignored = 0
+
+    def reset_counters(self):
+        self.requests = 0
+        self.function_codes.clear()
+        self.connections = 0
+        self.dropped = 0
+        self.exceptions = 0
+        self.ignored = 0
+
+    async def start(self, input_registers=None, holding_registers=None, coils=None):
+        """Start server and proxy; returns the port clients should use."""
+        device = ModbusDeviceContext(
+            di=_block({}, False),
+            co=_block(coils or default_coils(), False),
+            hr=_block(holding_registers or default_holding_registers(), 0),
+            ir=_block(input_registers or default_input_registers(), 0),
+        )
+        self._upstream_port = _free_port(self.host)
+        self._server = ModbusTcpServer(
+            ModbusServerContext(device, single=True),
+            address=(self.host, self._upstream_port),
+        )
+        await self._server.serve_forever(background=True)
+        self._proxy = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._proxy.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self):
+        for writer in list(self._writers):
+            writer.close()
+        await asyncio.sleep(0)
+        for task in list(self._tasks):
+            task.cancel()
+        if self._proxy is not None:
+            self._proxy.close()
+            await self._proxy.wait_closed()
+        if self._server is not None:
+            await self._server.shutdown()
+
+    def _spawn(self, coro):
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _delay(self):
+        jitter = self._rng.uniform(-self.faults.jitter, self.faults.jitter)
+        return max(0.0, self.faults.latency + jitter)
+
+    async def _reply(self, delay, frame, writer):
+        await asyncio.sleep(delay)
+        if not writer.is_closing():
+            writer.write(frame)
+
+    async def _relay(self, delay, frame, link, writer):
+        """Pass one request through the link delay to the server and back.
+
+        The pymodbus server only answers the first of several frames that
+        arrive together, so requests reach it one at a time; the link delay
+        is applied per request, concurrently, like a gateway that pipelines.
+        """
+        try:
+            await asyncio.sleep(delay)
+            async with link.lock:
+                link.writer.write(frame)
+                header = await link.reader.readexactly(_MBAP.size)
+                body = await link.reader.readexactly(_MBAP.unpack(header)[2] - 1)
+            if not writer.is_closing():
+                writer.write(header + body)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+        finally:
+            link.in_flight -= 1
+
+    async def _handle_client(self, reader, writer):
+        self.connections += 1
+        self._writers.add(writer)
+        link = _Link(*await asyncio.open_connection(self.host, self._upstream_port))
+        try:
+            while True:
+                header = await reader.readexactly(_MBAP.size)
+                transaction_id, _protocol, length, unit = _MBAP.unpack(header)
+                pdu = await reader.readexactly(length - 1)
+                self.requests += 1
+                self.function_codes[pdu[0]] += 1
+
+                if self._rng.random() < self.faults.drop_rate:
+                    self.dropped += 1
+                    break
+                if self.faults.serial_only and link.in_flight:
+                    # A gateway that can't pipeline silently loses the request
+                    self.ignored += 1
+                    continue
+                if self._rng.random() < self.faults.exception_rate:
+                    self.exceptions += 1
+                    body = bytes((pdu[0] | 0x80, _EXCEPTION_CODE))
+                    frame = _MBAP.pack(transaction_id, 0, len(body) + 1, unit) + body
+                    self._spawn(self._reply(self._delay(), frame, writer))
+                    continue
+                link.in_flight += 1
+                self._spawn(self._relay(self._delay(), header + pdu, link, writer))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            link.writer.close()
+            writer.close()
+            self._writers.discard(writer)
+
+
+class _Link:
+    """Per client connection: the upstream socket and requests in flight."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.lock = asyncio.Lock()
+        self.in_flight = 0
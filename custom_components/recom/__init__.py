@@ -1,48 +1,132 @@
-import inspect
 import json
-import threading
+import time
 from typing import Optional
+import voluptuous as vol
 from datetime import timedelta
 
-from pymodbus.client import ModbusTcpClient as ModbusClient  # 3.x import
-from pymodbus.exceptions import ModbusIOException, ConnectionException
-
 from homeassistant import core
 from homeassistant.core import HomeAssistant
-from homeassistant.core import callback
+from homeassistant.core import callback, ServiceCall, SupportsResponse
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_NAME, CONF_HOST, CONF_PORT, CONF_SCAN_INTERVAL, Platform
-from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util, slugify
 
 from .const import (
     DOMAIN,
     DEFAULT_NAME,
     DEFAULT_SCAN_INTERVAL,
     DEFAULT_PORT,
+    CONF_UNIT_ID,
+    DEFAULT_UNIT_ID,
+    CONF_PIPELINE_WINDOW,
+    DEFAULT_PIPELINE_WINDOW,
+    CONF_SIDECAR,
+    DEFAULT_SIDECAR,
+    CONF_MAX_READ_GAP,
+    DEFAULT_MAX_READ_GAP,
+    CONF_FORCE_REFRESH_CYCLES,
+    DEFAULT_FORCE_REFRESH_CYCLES,
+    CONF_FAST_SCAN_INTERVAL,
+    CONF_SLOW_SCAN_INTERVAL,
+    DEFAULT_FAST_SCAN_INTERVAL,
+    DEFAULT_SLOW_SCAN_INTERVAL,
+    POLL_TIER_FAST,
+    POLL_TIER_NORMAL,
+    POLL_TIER_SLOW,
+    CONF_VERIFY_WRITES,
+    DEFAULT_VERIFY_WRITES,
+    CONF_MAX_AGE,
+    DEFAULT_MAX_AGE,
+    CONF_RECORD_TRAFFIC,
+    DEFAULT_RECORD_TRAFFIC,
+    RECORD_MAX_BYTES,
+    RECORD_BACKUP_COUNT,
+    CONF_SAMPLE_INTERVAL,
+    DEFAULT_SAMPLE_INTERVAL,
+    DEFAULT_SAMPLE_WINDOW_SECONDS,
+    SAMPLE_HISTORY_SECONDS,
+    SAMPLED_SENSORS,
+    STATISTICS_IMPORT_DELAY_SECONDS,
+    CONF_SUPPLY_AIRFLOW,
+    CONF_SUPPLY_AIRFLOW_RPM,
+    DEFAULT_SUPPLY_AIRFLOW,
+    DEFAULT_SUPPLY_AIRFLOW_RPM,
+    DEADBAND_ABSOLUTE,
+    SENSOR_DEADBANDS,
+    SENSOR_TYPES,
+    WRITE_DEBOUNCE_SECONDS,
+    BURST_MIN_INTERVAL_SECONDS,
+    BURST_DURATION_SECONDS,
+    BURST_AFTER_WRITE_SENSORS,
+    BURST_THRESHOLDS,
+    SNAPSHOT_STORAGE_VERSION,
+    SNAPSHOT_SAVE_DELAY,
     FAN_SPEED_MODES,
+    FAN_SPEED_MODE_MANUAL,
+    SERVICE_WRITE_REGISTERS,
+    SERVICE_GET_SAMPLES,
+    ATTR_ADDRESS,
+    ATTR_VALUES,
+    ATTR_TABLE,
+    ATTR_SECONDS,
     ENTITY_FAN,
     ENTITY_SENSOR,
-    MODBUS_INPUT_REGISTER,
-    MODBUS_COIL
+    ENTITY_BINARY_SENSOR,
+    ENTITY_DIAGNOSTIC,
+    ENTITY_DERIVED,
+    MODBUS_COIL,
+    MODBUS_HOLDING_REGISTER,
+    DATA_TYPE_S16,
+    DATA_TYPE_U16,
+    WORD_ORDER_BIG,
 )
+from .connection import acquire_connection, release_connection
+from .fleet import get_fleet_scheduler
+from .core.decoder import BIT_READ_METHODS, scaled_value
+from .core.derived import derived_formulas
+from .core.engine import Point, RecomEngine
+from .core.recorder import TrafficRecorder
+from .core.samples import SampleRing
+from .core.stats import HubStats
 
 import logging
 _LOGGER = logging.getLogger(__name__)
 
+WRITE_REGISTERS_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_NAME): cv.string,
+        vol.Required(ATTR_ADDRESS): vol.All(vol.Coerce(int), vol.Range(min=0, max=0xFFFF)),
+        vol.Required(ATTR_VALUES): vol.All(
+            cv.ensure_list, vol.Length(min=1), [vol.All(vol.Coerce(int), vol.Range(min=0, max=0xFFFF))]
+        ),
+        vol.Optional(ATTR_TABLE, default=MODBUS_HOLDING_REGISTER): vol.In(
+            [MODBUS_HOLDING_REGISTER, MODBUS_COIL]
+        ),
+    }
+)
+
+GET_SAMPLES_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_NAME): cv.string,
+        vol.Optional(ATTR_SECONDS, default=DEFAULT_SAMPLE_WINDOW_SECONDS): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=SAMPLE_HISTORY_SECONDS)
+        ),
+    }
+)
+
 PLATFORMS: list[Platform] = [
+    Platform.BINARY_SENSOR,
     Platform.FAN,
     Platform.SENSOR,
 ]
 
-def _decode_s16_from_registers(instance, divide_by: float = 1.0) -> Optional[float]:
-    """Mimic old BinaryPayloadDecoder.decode_16bit_int() on a single register."""
-    if hasattr(instance, "isError") and instance.isError():
-        _LOGGER.error("The register does not exist, Try again.")
-        return None
-    if not hasattr(instance, "registers") or not instance.registers:
-        _LOGGER.error("Empty register response.")
-        return None
-    val = int(instance.registers[0])
+def _decode_s16(value, divide_by: float = 1.0) -> Optional[float]:
+    """Decode one raw register word as signed 16-bit and scale it."""
+    val = int(value)
     # interpret as signed 16-bit
     if val >= 0x8000:
         val -= 0x10000
@@ -56,325 +140,829 @@ def _decode_s16_from_registers(instance, divide_by: float = 1.0) -> Optional[flo
 async def async_setup(hass, config):
     """Set up the recom component."""
     hass.data[DOMAIN] = {}
+
+    def get_hub(name):
+        entry = hass.data[DOMAIN].get(name)
+        if not isinstance(entry, dict) or "hub" not in entry:
+            raise HomeAssistantError(f"No Recom unit named {name}")
+        return entry["hub"]
+
+    async def async_write_registers(call: ServiceCall):
+        """Write consecutive holding registers or coils of a unit in one request."""
+        name = call.data[CONF_NAME]
+        if not await get_hub(name).write_registers(
+            call.data[ATTR_TABLE], call.data[ATTR_ADDRESS], call.data[ATTR_VALUES]
+        ):
+            raise HomeAssistantError(f"Modbus write to {name} failed")
+
+    async def async_get_samples(call: ServiceCall):
+        """Return the raw samples a unit took over the last seconds."""
+        return get_hub(call.data[CONF_NAME]).samples(call.data[ATTR_SECONDS])
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_WRITE_REGISTERS, async_write_registers, schema=WRITE_REGISTERS_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_GET_SAMPLES, async_get_samples, schema=GET_SAMPLES_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
     return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Set up recom modbus."""
+    setup_start = time.perf_counter()
     host = entry.options.get(CONF_HOST, entry.data[CONF_HOST])
     port = entry.options.get(CONF_PORT, entry.data[CONF_PORT])
     name = entry.data[CONF_NAME]  # keep name from data (unique_id/title)
+    unit_id = entry.options.get(CONF_UNIT_ID, entry.data.get(CONF_UNIT_ID, DEFAULT_UNIT_ID))
     scan_interval = entry.options.get(CONF_SCAN_INTERVAL, entry.data[CONF_SCAN_INTERVAL])
+    max_read_gap = entry.options.get(CONF_MAX_READ_GAP, DEFAULT_MAX_READ_GAP)
+    force_refresh_cycles = entry.options.get(CONF_FORCE_REFRESH_CYCLES, DEFAULT_FORCE_REFRESH_CYCLES)
+    tier_intervals = {
+        POLL_TIER_FAST: entry.options.get(CONF_FAST_SCAN_INTERVAL, DEFAULT_FAST_SCAN_INTERVAL),
+        POLL_TIER_NORMAL: scan_interval,
+        POLL_TIER_SLOW: entry.options.get(CONF_SLOW_SCAN_INTERVAL, DEFAULT_SLOW_SCAN_INTERVAL),
+    }
+    verify_writes = entry.options.get(CONF_VERIFY_WRITES, DEFAULT_VERIFY_WRITES)
+    deadbands = {}
+    for key, (kind, option, default) in SENSOR_DEADBANDS.items():
+        size = entry.options.get(option, default)
+        if size:
+            deadbands[SENSOR_TYPES[key][0]] = (kind, size)
+    max_age = entry.options.get(CONF_MAX_AGE, DEFAULT_MAX_AGE)
+    recorder = None
+    if entry.options.get(CONF_RECORD_TRAFFIC, DEFAULT_RECORD_TRAFFIC):
+        recorder = TrafficRecorder(
+            hass.config.path(f"{DOMAIN}_traffic_{slugify(name)}.jsonl"), RECORD_MAX_BYTES, RECORD_BACKUP_COUNT
+        )
 
-    hub = RecomModbusHub(
-        hass, name, host, port, scan_interval
+    formulas = derived_formulas(
+        entry.options.get(CONF_SUPPLY_AIRFLOW, DEFAULT_SUPPLY_AIRFLOW),
+        entry.options.get(CONF_SUPPLY_AIRFLOW_RPM, DEFAULT_SUPPLY_AIRFLOW_RPM),
     )
 
-    try:
-        await hass.async_add_executor_job(hub.connect)
-    except Exception as e:
-        _LOGGER.warning("Failed to connect to Modbus device %s:%s : %s", host, port, str(e))
-        
+    pipeline_window = entry.options.get(CONF_PIPELINE_WINDOW, DEFAULT_PIPELINE_WINDOW)
+    sidecar = entry.options.get(CONF_SIDECAR, DEFAULT_SIDECAR)
+    if sidecar:
+        from .remote import RemoteRecomHub
+
+        hub = RemoteRecomHub(
+            hass, name, sidecar, host, port, pipeline_window, unit_id, scan_interval, max_read_gap,
+            force_refresh_cycles, tier_intervals, verify_writes, deadbands, max_age, derived_formulas=formulas
+        )
+        entry.async_create_background_task(hass, hub.async_run_link(), f"{DOMAIN} {name} sidecar link")
+    else:
+        connection = acquire_connection(hass, host, port, pipeline_window)
+        hub = RecomModbusHub(
+            hass, name, connection, unit_id, scan_interval, max_read_gap, force_refresh_cycles, tier_intervals,
+            verify_writes, deadbands, max_age, recorder,
+            entry.options.get(CONF_SAMPLE_INTERVAL, DEFAULT_SAMPLE_INTERVAL), formulas
+        )
+
+    # The connection (and pymodbus) is set up by the first request, so a unit
+    # that is down doesn't hold up Home Assistant's start.
+
+    # Last known values are published as soon as the entities are added
+    await hub.async_load_snapshot()
+
     """Register the hub."""
     hass.data[DOMAIN][name] = {"hub": hub}
 
     await hass.async_create_task(
         hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     )
+    # All entities are registered now; replace the restored values right away
+    entry.async_create_background_task(
+        hass, hub.async_first_poll(), f"{DOMAIN} {name} first poll"
+    )
+    hub.stats.setup_ms = (time.perf_counter() - setup_start) * 1000
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
 
     return True
 
+
+async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Unload recom modbus."""
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unload_ok:
+        hub = hass.data[DOMAIN].pop(entry.data[CONF_NAME])["hub"]
+        await hub.close()
+    return unload_ok
+
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Apply changed options by reloading the entry."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
 class RecomModbusHub:
-    """Thread safe wrapper class for pymodbus."""
+    """Asyncio wrapper class for pymodbus; all I/O runs on the event loop."""
 
     def __init__(
         self,
         hass,
         name,
-        host,
-        port,
-        scan_interval
+        connection,
+        unit_id,
+        scan_interval,
+        max_read_gap=DEFAULT_MAX_READ_GAP,
+        force_refresh_cycles=DEFAULT_FORCE_REFRESH_CYCLES,
+        tier_intervals=None,
+        verify_writes=DEFAULT_VERIFY_WRITES,
+        deadbands=None,
+        max_age=DEFAULT_MAX_AGE,
+        recorder=None,
+        sample_interval=DEFAULT_SAMPLE_INTERVAL,
+        derived_formulas=None
     ):
         """Initialize the Modbus hub."""
         self._hass = hass
-        self._client = ModbusClient(host=host, port=port, timeout=5)
-        self._lock = threading.Lock()
+        # Units behind the same gateway share one connection; requests are
+        # told apart by unit ID.
+        self._connection = connection
         self._name = name
-        self._scan_interval = timedelta(seconds=scan_interval)
-        self._unsub_interval_method = None
-        self._unsub_interval_method_entity = None
+        # Each poll tier has its own interval; the hub ticks at the shortest one
+        # and every tick reads only the tiers that are due.
+        self._tier_intervals = tier_intervals or {POLL_TIER_NORMAL: scan_interval}
+        self._tier_intervals.setdefault(POLL_TIER_NORMAL, scan_interval)
+        self._scan_interval = timedelta(seconds=min(self._tier_intervals.values()))
+        self._max_read_gap = max_read_gap
+        # This hub's ScheduledPoll in the domain wide FleetScheduler, while it has entities
+        self._scheduled = None
         self._fans = []
         self._entities = []
         self.data = {}
-        self._id_kw = self._detect_device_kw()
-        self._id_kwargs = {self._id_kw: 1}
+        # (modbus table, address) -> latest raw value the engine reported
+        self._raw = {}
+        # Sensor name -> latest decoded value; self.data only holds what was
+        # published, which lags behind within the deadband
+        self.latest = {}
+        # Sensor name -> (DEADBAND_ABSOLUTE/DEADBAND_RELATIVE, size)
+        self._deadbands = deadbands or {}
+        # Publish a value held back by its deadband once the last publish is this old (s)
+        self._max_age = max_age
+        self._published_at = {}
+        self._force_refresh_cycles = force_refresh_cycles
+        # Set while publishing a forced cycle: every entity goes out, changed or not
+        self._force_refresh = False
+        # (modbus table, address) -> (entity, value) waiting to be written
+        self._pending_writes = {}
+        self._unsub_write_flush = None
+        self._verify_writes = verify_writes
+        # Polling, decoding, change detection, write verification and the
+        # offline circuit breaker; with a sidecar (no connection) they run there
+        self._engine = None
+        if connection is not None:
+            self._engine = RecomEngine(
+                connection, (), self._tier_intervals, max_read_gap, unit_id, self.apply_delta,
+                name=name, force_refresh_cycles=force_refresh_cycles, verify_writes=verify_writes,
+                recorder=recorder,
+            )
+        self.stats = self._engine.stats if self._engine is not None else HubStats()
+        # Last published value per entity name, persisted across restarts:
+        # name -> (value, ISO timestamp of the poll that produced it)
+        self._store = Store(hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.snapshot.{name}")
+        self._snapshot = {}
+        # Store.async_delay_save restarts its delay on every call; only schedule
+        # a save when none is pending, or frequent publishes postpone it forever
+        self._save_pending = False
+        # name -> timestamp of restored values not yet confirmed by a live poll
+        self._stale = {}
+        self._refresh_running = False
+        # Burst polling: entity names read off-cycle, the current delay between
+        # burst reads and when the burst ends (monotonic)
+        self._burst_names = set()
+        self._burst_delay = BURST_MIN_INTERVAL_SECONDS
+        self._burst_until = 0
+        self._unsub_burst = None
+        self._burst_after_write = {SENSOR_TYPES[key][0] for key in BURST_AFTER_WRITE_SENSORS}
+        self._burst_thresholds = {SENSOR_TYPES[key][0]: size for key, size in BURST_THRESHOLDS.items()}
+        self.available = True
+        # Optional TrafficRecorder logging every request for later replay
+        self._recorder = recorder
+        # High resolution sampling: sensor name -> SampleRing, fed only by the
+        # sample timer so each ring holds SAMPLE_HISTORY_SECONDS of samples
+        self._sample_interval = sample_interval
+        self._sampled_names = frozenset(SENSOR_TYPES[key][0] for key in SAMPLED_SENSORS)
+        self._rings = {}
+        self._sampling = False
+        self._unsub_sample = None
+        self._unsub_statistics = None
+        # Derived sensor key -> formula over the latest values of its inputs;
+        # sensor names whose latest value changed since the last evaluation
+        self.derived_formulas = derived_formulas or {}
+        self._derived_dirty = set()
+
+    @property
+    def connection_stats(self):
+        """Retry/reconnect/timeout counters, shared by every unit on the connection."""
+        return self._connection.stats
+
+    def diagnostic_value(self, key):
+        """Return one DIAGNOSTIC_TYPES statistic."""
+        for source in (self.stats, self.connection_stats, self._scheduled):
+            if hasattr(source, key):
+                return getattr(source, key)
+        return None
 
-    def _detect_device_kw(self) -> str:
-        """Detect whether pymodbus expects device_id= (>=3.10) or slave=/unit= (older)."""
-        try:
-            sig = inspect.signature(self._client.read_holding_registers)
-            params = sig.parameters
-            if "device_id" in params:
-                return "device_id"
-            if "slave" in params:
-                return "slave"
-        except Exception:
-            pass
-        return "slave"
+    def diagnostics(self) -> dict:
+        """Hub and connection statistics for the diagnostics download."""
+        return {
+            "connection": {
+                "key": self._connection.key,
+                "users": self._connection.users,
+                "pipelined": self._connection.pipeline is not None,
+                **self.connection_stats.as_dict(),
+            },
+            "available": self.available,
+            "backoff_seconds": self._engine.backoff,
+            "tier_intervals": dict(self._tier_intervals),
+            "hub": self.stats.as_dict(),
+            "cycle_lag_ms": self._scheduled.cycle_lag_ms if self._scheduled is not None else None,
+            "fleet": get_fleet_scheduler(self._hass).as_dict(),
+            "sampling": self._sampling_diagnostics(),
+        }
+
+    @staticmethod
+    def _entity_keys(entity):
+        """Return the (modbus table, address) keys an entity is decoded from."""
+        if entity.entity_type in (ENTITY_DIAGNOSTIC, ENTITY_DERIVED):
+            return ()
+        if entity.entity_type == ENTITY_FAN:
+            return (
+                (MODBUS_COIL, entity.on_off_address),
+                (MODBUS_HOLDING_REGISTER, entity.speed_mode_address),
+                (MODBUS_HOLDING_REGISTER, entity.manual_speed_address),
+            )
+        return ((entity.modbus_type, entity.address),)
 
-    # ---------- connection + retry helpers ----------
+    def _tier_of(self, entity):
+        return getattr(entity, "poll_tier", POLL_TIER_NORMAL)
 
-    def _ensure_connected(self) -> bool:
-        """Ensure socket is connected; call connect() if needed."""
+    @staticmethod
+    def _notify(entity):
+        """Push new hub data to an entity; we are already on the event loop."""
+        try:
+            entity.update_callback()
+        except Exception:
+            _LOGGER.exception("Failed to run entity update_callback")
+
+    def _notify_diagnostics(self):
+        """Refresh the diagnostic sensors after a poll cycle."""
+        for entity in self._entities:
+            if entity.entity_type == ENTITY_DIAGNOSTIC:
+                self._notify(entity)
+
+    def _publish(self, entity):
+        """Push a freshly polled value to an entity and remember it for the next start."""
+        self._stale.pop(entity.name, None)
+        self._published_at[entity.name] = time.monotonic()
+        value = self.data[entity.name]
+        if isinstance(value, dict):
+            # Fan data is updated in place by optimistic writes
+            value = dict(value)
+        self._snapshot[entity.name] = (value, dt_util.utcnow().isoformat())
+        if not self._save_pending:
+            self._save_pending = True
+            self._store.async_delay_save(self._snapshot_data, SNAPSHOT_SAVE_DELAY)
+        self._notify(entity)
+
+    def _snapshot_data(self):
+        self._save_pending = False
+        return {"values": {name: list(item) for name, item in self._snapshot.items()}}
+
+    async def async_load_snapshot(self):
+        """Load the values persisted by the previous run and mark them stale."""
         try:
-            return bool(self._client.connect())
+            stored = await self._store.async_load()
         except Exception as e:
-            _LOGGER.error("Modbus connect failed: %s", e)
-            return False
+            _LOGGER.warning("Could not load the last known values of %s: %s", self._name, e)
+            return
+        if not stored:
+            return
+        for name, (value, updated) in stored.get("values", {}).items():
+            self._snapshot[name] = (value, updated)
+            self.data.setdefault(name, value)
+            self._stale[name] = updated
 
-    def _call_with_retry(self, func, *args, **kwargs):
-        """Call a Modbus function; on connection errors reconnect and retry once (no string checks)."""
-        with self._lock:
-            def _reconnect_and_retry():
-                try:
-                    self._client.close()
-                except Exception:
-                    pass
-                if not self._ensure_connected():
-                    return None
-                try:
-                    return func(*args, **kwargs)
-                except Exception as e2:
-                    _LOGGER.error("Modbus retry failed: %s", e2)
-                    return None
+    def stale_since(self, name) -> Optional[str]:
+        """Timestamp of a restored value that no live poll has confirmed yet, else None."""
+        return self._stale.get(name)
 
-            try:
-                self._ensure_connected()
-                return func(*args, **kwargs)
-
-            # Direct low-level socket/connection errors
-            except (BrokenPipeError, OSError, ConnectionError, ConnectionException) as e:
-                _LOGGER.warning("Modbus connection error: %s. Reconnecting and retrying once...", e)
-                return _reconnect_and_retry()
-
-            # ModbusIOException may wrap connection errors
-            except ModbusIOException as e:
-                inner = getattr(e, "__cause__", None) or getattr(e, "__context__", None)
-                disconnected = getattr(self._client, "connected", True) is False
-                if isinstance(inner, (BrokenPipeError, OSError, ConnectionError)) or disconnected:
-                    _LOGGER.warning("Modbus IO error (connection-related): %s. Reconnecting and retrying once...", e)
-                    return _reconnect_and_retry()
-                _LOGGER.warning("Modbus IO error (non-connection): %s", e)
-                return None
+    @callback
+    def queue_write(self, entity, table, address, value, update_fn=None):
+        """Queue a coil/holding register write; the last value per address wins."""
+        return self.queue_writes(entity, [(table, address, value)], update_fn)
 
-            # Anything else: suppress & log once
+    @callback
+    def queue_writes(self, entity, writes, update_fn=None):
+        """Queue (table, address, value) writes that belong to one entity change.
+
+        The entity is updated optimistically right away, once for all of
+        them. Everything queued within WRITE_DEBOUNCE_SECONDS of the first
+        write is flushed together, with consecutive addresses merged into
+        one FC15/FC16 request.
+        """
+        for table, address, value in writes:
+            key = (table, address)
+            self._pending_writes.pop(key, None)
+            self._pending_writes[key] = (entity, value)
+
+        data = self.data.setdefault(entity.name, {})
+        if callable(update_fn):
+            try:
+                update_fn(data)
             except Exception as e:
-                _LOGGER.warning("Unexpected Modbus error (suppressed): %s", e)
-                return None
+                _LOGGER.exception("Error running update_fn for %s: %s", entity.name, e)
+        self._notify(entity)
 
-    def _write_and_update(self, entity, write_func, *write_args, write_kwargs=None, update_fn=None):
-        write_kwargs = write_kwargs or {}
-        res = self._call_with_retry(write_func, *write_args, **write_kwargs)
-        if res is None:
-            _LOGGER.warning("Modbus write failed for %s", getattr(entity, "name", "<unknown>"))
-            return False
+        if self._unsub_write_flush is None:
+            self._unsub_write_flush = async_call_later(
+                self._hass, WRITE_DEBOUNCE_SECONDS, self.async_flush_writes
+            )
+        return True
 
-        with self._lock:
-            data = self.data.setdefault(entity.name, {})
-            if callable(update_fn):
-                try:
-                    update_fn(data)
-                except Exception as e:
-                    _LOGGER.exception("Error running update_fn for %s: %s", entity.name, e)
+    async def _send_writes(self, table, values):
+        """Write address -> value to a table in as few requests as possible.
 
-        try:
-            self._hass.add_job(entity.update_callback)
-        except Exception:
-            try:
-                self._hass.loop.call_soon_threadsafe(entity.update_callback)
-            except Exception:
-                _LOGGER.exception("Failed to schedule entity update_callback")
+        Returns address -> whether the request carrying it succeeded.
+        """
+        return await self._engine.write(table, values)
 
-        return True
+    async def async_flush_writes(self, _now=None):
+        """Send all queued writes now; the debounce timer calls this too."""
+        if self._unsub_write_flush is not None:
+            self._unsub_write_flush()
+            self._unsub_write_flush = None
+        if not self._pending_writes:
+            return
+        pending, self._pending_writes = self._pending_writes, {}
+        by_table = {}
+        for (table, address), (entity, value) in pending.items():
+            by_table.setdefault(table, {})[address] = value
+        for table, values in by_table.items():
+            results = await self._send_writes(table, values)
+            for address, ok in results.items():
+                if not ok:
+                    entity, _value = pending[(table, address)]
+                    _LOGGER.warning("Modbus write failed for %s", getattr(entity, "name", "<unknown>"))
+        # Follow the unit's reaction instead of waiting for the next cycle
+        self._start_burst({entity.name for entity, _value in pending.values()} | self._burst_after_write)
+
+    async def write_registers(self, table, address, values) -> bool:
+        """Write consecutive holding registers/coils now, as one FC16/FC15 request.
+
+        Queued entity writes to the same addresses are dropped, so a later
+        flush can't overwrite what was written here.
+        """
+        values = dict(enumerate(values, start=address))
+        for written in values:
+            self._pending_writes.pop((table, written), None)
+        results = await self._send_writes(table, values)
+        return all(results.values())
 
     @callback
     def async_add_entity(self, entity, update_callback):
         """Listen for data updates."""
         if not self._entities:
-            self._unsub_interval_method_entity = async_track_time_interval(
-                self._hass, self.async_refresh_modbus_data_entity, self._scan_interval
-            )
+            self._start_polling()
         self._entities.append(entity)
+        self._entities_changed()
+        if entity.name in self.data:
+            # Restored from the last run; the first poll replaces it
+            self._notify(entity)
         return True
 
-    def read_input_registers(self, address, divide_value_by):
-        res = self._call_with_retry(
-            self._client.read_input_registers,
-            address=address, count=1, **self._id_kwargs
-        )
-        if res is None:
-            return None
-        return _decode_s16_from_registers(res, divide_value_by)
+    @callback
+    def async_remove_entity(self, entity):
+        """Stop polling an entity, e.g. because it was disabled in the entity registry."""
+        if entity not in self._entities:
+            return
+        self._entities.remove(entity)
+        self._entities_changed()
+        self.data.pop(entity.name, None)
+        for key in self._entity_keys(entity):
+            self._raw.pop(key, None)
+        if not self._entities:
+            self._stop_polling()
 
-    def read_holding_registers(self, address, divide_value_by = 1):
-        res = self._call_with_retry(
-            self._client.read_holding_registers,
-            address=address, count=1, **self._id_kwargs
+    def _start_polling(self):
+        self._scheduled = get_fleet_scheduler(self._hass).register(
+            self._name, self._scan_interval.total_seconds(), self.async_refresh_modbus_data_entity,
+            self._skip_cycle,
         )
-        if res is None:
-            return None
-        return _decode_s16_from_registers(res, divide_value_by)
-
-    def read_coils(self, address):
-        res = self._call_with_retry(
-            self._client.read_coils,
-            address=address, count=1, **self._id_kwargs
+        if self._sample_interval:
+            self._unsub_sample = async_call_later(self._hass, self._sample_interval, self._async_sample)
+            self._schedule_statistics()
+
+    def _stop_polling(self):
+        if self._scheduled is not None:
+            self._scheduled.cancel()
+            self._scheduled = None
+        for unsub in (self._unsub_sample, self._unsub_statistics):
+            if unsub is not None:
+                unsub()
+        self._unsub_sample = None
+        self._unsub_statistics = None
+
+    def _entities_changed(self):
+        self._engine.set_points(self._points())
+
+    def _points(self):
+        """The engine's points for every polled entity."""
+        points = []
+        for entity in self._entities:
+            tier = self._tier_of(entity)
+            if entity.entity_type == ENTITY_FAN:
+                points.append(Point(MODBUS_COIL, entity.on_off_address, DATA_TYPE_U16, WORD_ORDER_BIG, None, tier))
+                for address in (entity.speed_mode_address, entity.manual_speed_address):
+                    points.append(Point(MODBUS_HOLDING_REGISTER, address, DATA_TYPE_U16, WORD_ORDER_BIG, None, tier))
+            elif entity.entity_type in (ENTITY_SENSOR, ENTITY_BINARY_SENSOR):
+                points.append(Point(
+                    entity.modbus_type,
+                    entity.address,
+                    getattr(entity, "data_type", DATA_TYPE_S16),
+                    getattr(entity, "word_order", WORD_ORDER_BIG),
+                    getattr(entity, "bit", None),
+                    tier,
+                ))
+        return points
+
+    def _keys_of(self, names):
+        """The (modbus table, address) keys the entities ``names`` are decoded from."""
+        return frozenset(
+            key for entity in self._entities if entity.name in names for key in self._entity_keys(entity)
         )
-        if res is None:
-            return None
-        if hasattr(res, 'bits') and res.bits:
-            return res.bits[0]
-        return None
 
-    def refresh_sensor(self):
-        entities = filter(lambda x: x.entity_type == ENTITY_SENSOR, self._entities)
-        for entity in entities:
-            update_result = None
-            if entity.modbus_type == MODBUS_INPUT_REGISTER:
-                divide_value_by = 1
-                if hasattr(entity, 'divide_value_by'):
-                    divide_value_by = entity.divide_value_by
-                update_result = self.read_input_registers(entity.address, divide_value_by)
-
-            elif entity.modbus_type == MODBUS_COIL:
-                update_result = self.read_coils(entity.address)
-
-            if update_result == False:
-                update_result = 0
-
-            if entity.name not in self.data or self.data[entity.name] != update_result:
-                self.data[entity.name] = update_result
-                try:
-                    self._hass.add_job(entity.update_callback)
-                except Exception:
-                    try:
-                        self._hass.loop.call_soon_threadsafe(entity.update_callback)
-                    except Exception:
-                        _LOGGER.exception("Failed to schedule entity update_callback")
-
-    def refresh_fan(self):
-        entities = filter(lambda x: x.entity_type == ENTITY_FAN, self._entities)
-        for entity in entities:
-            self.data[entity.name] = {}
-            
-            """ On/Off """
-            on_off = self.read_coils(entity.on_off_address)
-            self.data[entity.name]["on_off"] = on_off
-
-            """ Speed mode """
-            speed_mode = self.read_holding_registers(entity.speed_mode_address)
-            if speed_mode is not None:
-                try:
-                    speed_mode = FAN_SPEED_MODES[speed_mode]
-                    self.data[entity.name]["speed_mode"] = speed_mode
-                except Exception:
-                    _LOGGER.warning("Unknown speed mode value: %s", speed_mode)
-
-            """ Manual speed percentage """
-            manual_speed = self.read_holding_registers(entity.manual_speed_address)
-            if manual_speed == False:
-                manual_speed = 0
-            self.data[entity.name]["manual_speed"] = manual_speed
+    async def async_poll(self, names=None):
+        """Read the entities ``names`` (None = all) now, outside the poll cycle, and publish them."""
+        await self._engine.poll(keys=None if names is None else self._keys_of(names))
+
+    def apply_delta(self, delta, available, forced=False):
+        """Publish one poll of the engine: the raw values that changed, as {(table, address): value}.
+
+        Every entity is checked, not only those in the delta, so values held
+        back by a deadband go out once they reach the max age, and a forced
+        cycle republishes everything.
+        """
+        self._set_available(available)
+        if not available:
+            return
+        self._raw.update(delta)
+        self._force_refresh = forced
+        for entity in list(self._entities):
+            keys = self._entity_keys(entity)
+            if not keys or not all(key in self._raw for key in keys):
+                continue
+            changed = forced or not delta.keys().isdisjoint(keys)
+            if entity.entity_type == ENTITY_FAN:
+                if changed or entity.name not in self.data:
+                    self._apply_fan(entity, self._raw)
+            elif entity.modbus_type in BIT_READ_METHODS:
+                if changed or entity.name not in self.data:
+                    self._apply_bit_value(entity, self._raw[keys[0]])
+            else:
+                self._apply_sensor_value(entity, self._sensor_value(entity, self._raw[keys[0]]), changed)
+        self._update_derived()
+        self._force_refresh = False
+
+    def _set_available(self, available):
+        if available == self.available:
+            return
+        self.available = available
+        for entity in self._entities:
+            self._notify(entity)
+
+    @staticmethod
+    def _sensor_value(entity, raw):
+        return scaled_value(raw, getattr(entity, "bit", None), entity.divide_value_by)
+
+    def _apply_sensor_value(self, entity, value, changed):
+        """Take a decoded sensor value and publish it unless its deadband holds it back."""
+        name = entity.name
+        if changed or name not in self.latest:
+            if value == False:
+                value = 0
+            self._check_transient(name, value)
+            self.latest[name] = value
+            self._derived_dirty.add(name)
+        if name in self.data and not self._should_publish(name, self.latest[name]):
+            return
+        self.data[name] = self.latest[name]
+        self._publish(entity)
+
+    def _should_publish(self, name, value) -> bool:
+        """Whether a decoded sensor value differs enough from the published one, or is too old."""
+        published = self.data[name]
+        if self._force_refresh or name in self._stale:
+            return True
+        if value == published:
+            return False
+        deadband = self._deadbands.get(name)
+        if deadband is None or value is None or published is None:
+            return True
+        kind, amount = deadband
+        limit = amount if kind == DEADBAND_ABSOLUTE else abs(published) * amount / 100
+        if abs(value - published) > limit:
+            return True
+        return bool(self._max_age) and time.monotonic() - self._published_at.get(name, 0) >= self._max_age
+
+    def _apply_bit_value(self, entity, value):
+        if entity.entity_type == ENTITY_SENSOR and value == False:
+            value = 0
+        self.data[entity.name] = value
+        self._publish(entity)
+
+    def _apply_fan(self, entity, snapshot):
+        """Decode a fan's on/off coil and speed registers from raw values and publish them."""
+        on_off_key, speed_mode_key, manual_speed_key = self._entity_keys(entity)
+        self.data[entity.name] = {}
+
+        """ On/Off """
+        self.data[entity.name]["on_off"] = snapshot.get(on_off_key)
+
+        """ Speed mode """
+        speed_mode = snapshot.get(speed_mode_key)
+        if speed_mode is not None:
             try:
-                self._hass.add_job(entity.update_callback)
+                speed_mode = FAN_SPEED_MODES[_decode_s16(speed_mode)]
+                self.data[entity.name]["speed_mode"] = speed_mode
             except Exception:
-                try:
-                    self._hass.loop.call_soon_threadsafe(entity.update_callback)
-                except Exception:
-                    _LOGGER.exception("Failed to schedule entity update_callback")
-
-    def _do_refresh(self):
-        if not self._entities:
+                _LOGGER.warning("Unknown speed mode value: %s", speed_mode)
+
+        """ Manual speed percentage """
+        manual_speed = snapshot.get(manual_speed_key)
+        if manual_speed is not None:
+            manual_speed = _decode_s16(manual_speed)
+        if manual_speed == False:
+            manual_speed = 0
+        self.data[entity.name]["manual_speed"] = manual_speed
+        self._publish(entity)
+
+    def _update_derived(self):
+        """Evaluate the derived sensors with an input that changed in this snapshot."""
+        if not self._derived_dirty:
             return
-
+        dirty, self._derived_dirty = self._derived_dirty, set()
+        for entity in self._entities:
+            if entity.entity_type != ENTITY_DERIVED or dirty.isdisjoint(entity.inputs):
+                continue
+            values = [self.latest.get(name) for name in entity.inputs]
+            value = None
+            if None not in values:
+                value = self.derived_formulas[entity.key](*values)
+            if entity.name in self.data and value == self.data[entity.name] and not (
+                self._force_refresh or entity.name in self._stale
+            ):
+                continue
+            self.data[entity.name] = value
+            self._publish(entity)
+
+    # ---------- burst polling ----------
+
+    def _check_transient(self, name, value):
+        """Start a burst when a fast changing sensor jumps between two polls."""
+        threshold = self._burst_thresholds.get(name)
+        previous = self.latest.get(name)
+        if threshold is None or value is None or previous is None or self._burst_names:
+            return
+        if abs(value - previous) > threshold:
+            self._start_burst({name})
+
+    def _start_burst(self, names):
+        """Read ``names`` off-cycle at a short, growing interval for a bounded time."""
+        self._burst_names |= names
+        self._burst_delay = BURST_MIN_INTERVAL_SECONDS
+        self._burst_until = time.monotonic() + BURST_DURATION_SECONDS
+        if self._unsub_burst is None:
+            self._unsub_burst = async_call_later(self._hass, self._burst_delay, self._async_burst_poll)
+
+    async def _async_burst_poll(self, _now=None):
+        self._unsub_burst = None
+        names = frozenset(self._burst_names)
+        if self.available and not self._refresh_running:
+            self.stats.burst_polls += 1
+            try:
+                await self.async_poll(names)
+            except Exception as e:
+                _LOGGER.debug("Error in burst poll: %s", e)
+            if self._unsub_burst is not None:
+                # A write during the read restarted the burst
+                return
+        # Back off towards the regular interval; the burst ends once it gets there
+        self._burst_delay *= 2
+        if (
+            self._burst_delay >= self._scan_interval.total_seconds()
+            or time.monotonic() + self._burst_delay > self._burst_until
+        ):
+            self._burst_names.clear()
+            return
+        self._unsub_burst = async_call_later(self._hass, self._burst_delay, self._async_burst_poll)
+
+    # ---------- high resolution sampling ----------
+
+    def _record_samples(self, snapshot):
+        """Append the scaled values of the sampled sensors to their ring buffers."""
+        timestamp = time.time()
+        for entity in self._entities:
+            if entity.name not in self._sampled_names or entity.entity_type != ENTITY_SENSOR:
+                continue
+            value = self._sensor_value(entity, snapshot.get(self._entity_keys(entity)[0]))
+            if value is None:
+                continue
+            ring = self._rings.get(entity.name)
+            if ring is None:
+                capacity = max(1, int(SAMPLE_HISTORY_SECONDS / self._sample_interval))
+                ring = self._rings[entity.name] = SampleRing(capacity)
+            ring.append(timestamp, float(value))
+
+    async def _async_sample(self, _now=None):
+        """Read the sampled sensors into their ring buffers without publishing them."""
+        self._unsub_sample = async_call_later(self._hass, self._sample_interval, self._async_sample)
+        # Reads queue behind a running cycle on the connection, keeping the spacing even
+        if not self.available or self._sampling:
+            return
+        self._sampling = True
         try:
-            self.refresh_sensor()
+            keys = self._keys_of(self._sampled_names)
+            if not keys:
+                return
+            self.stats.sample_polls += 1
+            snapshot = await self._engine.read(keys)
+            if self.available:
+                self._record_samples(snapshot)
         except Exception as e:
-            _LOGGER.debug("Error in refresh_sensor: %s", e)
+            _LOGGER.debug("Error in sample poll: %s", e)
+        finally:
+            self._sampling = False
+
+    def _schedule_statistics(self):
+        now = dt_util.utcnow()
+        next_hour = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        self._unsub_statistics = async_call_later(
+            self._hass,
+            (next_hour - now).total_seconds() + STATISTICS_IMPORT_DELAY_SECONDS,
+            self._async_import_statistics,
+        )
 
+    def _statistic_metadata(self, name, unit):
+        metadata = {
+            "has_mean": True,
+            "has_sum": False,
+            "name": f"{self._name} {name}",
+            "source": DOMAIN,
+            "statistic_id": f"{DOMAIN}:{slugify(self._name)}_{slugify(name)}",
+            "unit_of_measurement": unit,
+        }
         try:
-            self.refresh_fan()
-        except Exception as e:
-            _LOGGER.debug("Error in refresh_fan: %s", e)
+            # Home Assistant 2025.4+ replaced has_mean with mean_type
+            from homeassistant.components.recorder.models import StatisticMeanType
+        except ImportError:
+            return metadata
+        metadata["mean_type"] = StatisticMeanType.ARITHMETIC
+        return metadata
+
+    async def _async_import_statistics(self, _now=None):
+        """Import the min/mean/max of the hour that just ended into long-term statistics."""
+        self._schedule_statistics()
+        if "recorder" not in self._hass.config.components:
+            return
+        from homeassistant.components.recorder.statistics import async_add_external_statistics
+
+        end = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+        start = end - timedelta(hours=1)
+        units = {entity.name: getattr(entity, "unit_of_measurement", None) for entity in self._entities}
+        for name, ring in self._rings.items():
+            aggregate = ring.aggregate(start.timestamp(), end.timestamp())
+            if aggregate is None:
+                continue
+            low, mean, high, _count = aggregate
+            async_add_external_statistics(
+                self._hass,
+                self._statistic_metadata(name, units.get(name)),
+                [{"start": start, "min": low, "mean": mean, "max": high}],
+            )
+
+    def samples(self, seconds) -> dict:
+        """Raw samples of the last ``seconds``: name -> [[unix timestamp, value], ...]."""
+        since = time.time() - seconds
+        return {
+            "interval": self._sample_interval,
+            "sensors": {name: ring.samples(since) for name, ring in self._rings.items()},
+        }
+
+    def _sampling_diagnostics(self):
+        if not self._sample_interval:
+            return None
+        now = time.time()
+        sensors = {}
+        for name, ring in self._rings.items():
+            aggregate = ring.aggregate(now - DEFAULT_SAMPLE_WINDOW_SECONDS, now)
+            sensors[name] = {
+                "samples": len(ring),
+                "capacity": ring.capacity,
+                "recent": None if aggregate is None else dict(zip(("min", "mean", "max", "count"), aggregate)),
+            }
+        return {"interval": self._sample_interval, "window_s": DEFAULT_SAMPLE_WINDOW_SECONDS, "sensors": sensors}
+
+    def _skip_cycle(self):
+        """Count a poll cycle dropped because the previous one is still waiting on the unit."""
+        self.stats.skipped_cycles += 1
+        _LOGGER.debug("Skipping poll cycle of %s, previous cycle still running", self._name)
+
+    async def async_first_poll(self):
+        """Replace restored values right away, within the fleet's concurrency cap."""
+        if self._scheduled is not None:
+            await self._scheduled.async_run_now()
 
     async def async_refresh_modbus_data_entity(self, _now: Optional[int] = None) -> None:
         """Time to update."""
         if not self._entities:
             return
-        
+        if self._refresh_running:
+            self._skip_cycle()
+            return
+
+        self._refresh_running = True
         try:
-            await self._hass.async_add_executor_job(self._do_refresh)
+            await self._engine.cycle()
         except Exception as e:
+            self.stats.cycle_errors += 1
             _LOGGER.error("Error refreshing Modbus data: %s", e)
+        finally:
+            self._refresh_running = False
+        self._notify_diagnostics()
+        if self._recorder is not None:
+            await self._hass.async_add_executor_job(self._recorder.flush)
+
+    def _fan_writes(self, entity, percentage=None, preset_mode=None):
+        """Writes and optimistic data for a preset and/or speed change; None for an unknown preset."""
+        writes = []
+        updates = {}
+        if preset_mode is not None:
+            mode = None
+            for key, value in FAN_SPEED_MODES.items():
+                if value == preset_mode:
+                    mode = key
+            if mode is None:
+                return None
+            writes.append((MODBUS_HOLDING_REGISTER, entity.speed_mode_address, mode))
+            updates["speed_mode"] = preset_mode
+        if percentage is not None:
+            manual = FAN_SPEED_MODES[FAN_SPEED_MODE_MANUAL]
+            current = self.data.get(entity.name, {}).get("speed_mode")
+            if preset_mode is None and current != manual:
+                # The manual speed only applies in manual mode
+                writes.append((MODBUS_HOLDING_REGISTER, entity.speed_mode_address, FAN_SPEED_MODE_MANUAL))
+                updates["speed_mode"] = manual
+            writes.append((MODBUS_HOLDING_REGISTER, entity.manual_speed_address, percentage))
+            updates["manual_speed"] = percentage
+        return writes, updates
+
+    async def fan_speed_change_mode(self, entity, new_mode: str):
+        change = self._fan_writes(entity, preset_mode=new_mode)
+        if change is None:
+            return False
+        writes, updates = change
+        return self.queue_writes(entity, writes, update_fn=lambda d: d.update(updates))
 
-    def fan_speed_change_mode(self, entity, new_mode: str):
-        """ find speed mode number by ENUM """
-        for key, value in FAN_SPEED_MODES.items():
-            if value == new_mode:
-                mode = key
-
-        if mode is not None:
-            _ = self._call_with_retry(self._client.write_register, 2, mode, **self._id_kwargs)
-            self.data[entity.name]['speed_mode'] = new_mode
-            try:
-                self._hass.add_job(entity.update_callback)
-            except Exception:
-                try:
-                    self._hass.loop.call_soon_threadsafe(entity.update_callback)
-                except Exception:
-                    _LOGGER.exception("Failed to schedule entity update_callback")
-            return
-        return
-
-    def fan_set_percentage(self, entity, percentage):
-        return self._write_and_update(
-            entity,
-            self._client.write_register,
-            entity.manual_speed_address,
-            percentage,
-            write_kwargs=self._id_kwargs,
-            update_fn=lambda d: d.__setitem__("manual_speed", percentage),
-        )
+    async def fan_set_percentage(self, entity, percentage):
+        writes, updates = self._fan_writes(entity, percentage=percentage)
+        return self.queue_writes(entity, writes, update_fn=lambda d: d.update(updates))
 
-    def fan_turn_on(self, entity):
-        return self._write_and_update(
-            entity,
-            self._client.write_coil,
-            entity.on_off_address,
-            1,
-            write_kwargs=self._id_kwargs,
-            update_fn=lambda d: d.__setitem__("on_off", 1),
-        )
+    async def fan_turn_on(self, entity, percentage=None, preset_mode=None):
+        change = self._fan_writes(entity, percentage, preset_mode)
+        if change is None:
+            return False
+        writes, updates = change
+        writes.insert(0, (MODBUS_COIL, entity.on_off_address, 1))
+        updates["on_off"] = 1
+        return self.queue_writes(entity, writes, update_fn=lambda d: d.update(updates))
 
-    def fan_turn_off(self, entity):
-        return self._write_and_update(
+    async def fan_turn_off(self, entity):
+        return self.queue_write(
             entity,
-            self._client.write_coil,
+            MODBUS_COIL,
             entity.on_off_address,
             0,
-            write_kwargs=self._id_kwargs,
             update_fn=lambda d: d.__setitem__("on_off", 0),
         )
 
-    def connect(self):
+    async def connect(self):
         """Connect client."""
-        with self._lock:
-            self._ensure_connected()
-
-    def close(self):
-        """Disconnect client."""
-        with self._lock:
-            try:
-                self._client.close()
-            except Exception as e:
-                _LOGGER.debug("Error on close: %s", e)
+        await self._connection.connect()
+
+    async def close(self):
+        """Stop polling, flush queued writes and release the shared connection."""
+        self._stop_polling()
+        await self.async_flush_writes()
+        if self._unsub_burst is not None:
+            self._unsub_burst()
+            self._unsub_burst = None
+        await self._store.async_save(self._snapshot_data())
+        if self._recorder is not None:
+            await self._hass.async_add_executor_job(self._recorder.flush)
+        await self._close_transport()
+
+    async def _close_transport(self):
+        await release_connection(self._hass, self._connection)
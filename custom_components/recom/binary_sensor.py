@@ -0,0 +1,128 @@
+from homeassistant.core import callback
+from homeassistant.const import CONF_NAME
+from homeassistant.components.binary_sensor import BinarySensorEntity
+
+from typing import Optional, Dict, Any
+import logging
+_LOGGER = logging.getLogger(__name__)
+
+from .const import (
+    DOMAIN,
+    BINARY_SENSOR_TYPES,
+    ENTITY_BINARY_SENSOR
+)
+
+
+async def async_setup_entry(hass, entry, async_add_entities):
+    hub_name = entry.data[CONF_NAME]
+    hub = hass.data[DOMAIN][hub_name]["hub"]
+
+    device_info = {
+        "identifiers": {(DOMAIN, hub_name)},
+        "name": hub_name,
+        "manufacturer": "REC Indovent AB",
+    }
+
+    entities = []
+    for key, sensor_info in BINARY_SENSOR_TYPES.items():
+        entities.append(RecomBinarySensor(
+            hub_name,
+            device_info,
+            hub,
+            sensor_info[0],
+            key,
+            sensor_info[1],
+            sensor_info[2],
+            sensor_info[3],
+            sensor_info[4]
+        ))
+    async_add_entities(entities)
+
+    return True
+
+
+class RecomBinarySensor(BinarySensorEntity):
+    """Coil or discrete input flag, read in bulk by the hub."""
+
+    def __init__(self, platform_name, device_info, hub, name, key, address, modbus_type, device_class, poll_tier):
+        self._platform_name = platform_name
+        self._state = None
+        self._device_info = device_info
+        self._name = name
+        self._hub = hub
+        self._key = key
+        self._address = address
+        self._modbus_type = modbus_type
+        self._device_class = device_class
+        self._entity_type = ENTITY_BINARY_SENSOR
+        self._poll_tier = poll_tier
+
+    async def async_added_to_hass(self):
+        """Register callbacks."""
+        self._hub.async_add_entity(self, self.update_callback)
+
+    async def async_will_remove_from_hass(self):
+        """Stop polling this entity's registers."""
+        self._hub.async_remove_entity(self)
+
+    @callback
+    def update_callback(self):
+        self._state = self._hub.data.get(self._name)
+        self.async_write_ha_state()
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def address(self):
+        return self._address
+
+    @property
+    def entity_type(self):
+        return self._entity_type
+
+    @property
+    def modbus_type(self):
+        return self._modbus_type
+
+    @property
+    def poll_tier(self):
+        return self._poll_tier
+
+    @property
+    def is_on(self):
+        return self._state
+
+    @property
+    def available(self) -> bool:
+        return self._hub.available
+
+    @property
+    def extra_state_attributes(self) -> Optional[Dict[str, Any]]:
+        """Flag values restored from the last run until a poll confirms them."""
+        stale_since = self._hub.stale_since(self._name)
+        if stale_since is None:
+            return None
+        return {"restored": True, "last_polled": stale_since}
+
+    @property
+    def device_class(self):
+        return self._device_class
+
+    @property
+    def unique_id(self):
+        return self._name
+
+    @property
+    def has_entity_name(self):
+        return True
+
+    @property
+    def should_poll(self) -> bool:
+        """Data is delivered by the hub"""
+        return False
+
+    @property
+    def device_info(self) -> Optional[Dict[str, Any]]:
+        return self._device_info
@@ -13,6 +13,36 @@ from .const import (
     CONF_PORT,
     DEFAULT_SCAN_INTERVAL,
     DEFAULT_NAME,
+    CONF_UNIT_ID,
+    DEFAULT_UNIT_ID,
+    CONF_MAX_READ_GAP,
+    DEFAULT_MAX_READ_GAP,
+    CONF_FORCE_REFRESH_CYCLES,
+    DEFAULT_FORCE_REFRESH_CYCLES,
+    CONF_FAST_SCAN_INTERVAL,
+    CONF_SLOW_SCAN_INTERVAL,
+    DEFAULT_FAST_SCAN_INTERVAL,
+    DEFAULT_SLOW_SCAN_INTERVAL,
+    CONF_VERIFY_WRITES,
+    DEFAULT_VERIFY_WRITES,
+    CONF_PIPELINE_WINDOW,
+    DEFAULT_PIPELINE_WINDOW,
+    CONF_TEMPERATURE_DEADBAND,
+    CONF_FAN_SPEED_DEADBAND,
+    CONF_MAX_AGE,
+    DEFAULT_TEMPERATURE_DEADBAND,
+    DEFAULT_FAN_SPEED_DEADBAND,
+    DEFAULT_MAX_AGE,
+    CONF_RECORD_TRAFFIC,
+    DEFAULT_RECORD_TRAFFIC,
+    CONF_SIDECAR,
+    DEFAULT_SIDECAR,
+    CONF_SAMPLE_INTERVAL,
+    DEFAULT_SAMPLE_INTERVAL,
+    CONF_SUPPLY_AIRFLOW,
+    CONF_SUPPLY_AIRFLOW_RPM,
+    DEFAULT_SUPPLY_AIRFLOW,
+    DEFAULT_SUPPLY_AIRFLOW_RPM,
 )
 
 
@@ -24,6 +54,7 @@ class DomainConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 vol.Optional(CONF_NAME, default=DEFAULT_NAME): str,
                 vol.Required(CONF_HOST): str,
                 vol.Required(CONF_PORT, default=DEFAULT_PORT): int,
+                vol.Required(CONF_UNIT_ID, default=DEFAULT_UNIT_ID): vol.All(int, vol.Range(min=0, max=247)),
                 vol.Required(CONF_SCAN_INTERVAL, default=DEFAULT_SCAN_INTERVAL): int,
             }
         )
@@ -53,7 +84,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
     async def async_step_init(self, user_input: Dict[str, Any] | None = None):
         """Manage the options."""
         if user_input is not None:
-            # Save options (host/port/scan only)
+            # Save options (host/port/unit/scan tiers/read planning/publishing)
             return self.async_create_entry(title="", data=user_input)
 
         # Defaults prefer existing options; fall back to original data
@@ -62,13 +93,43 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
 
         host = opt.get(CONF_HOST, data.get(CONF_HOST, ""))
         port = opt.get(CONF_PORT, data.get(CONF_PORT, DEFAULT_PORT))
+        unit_id = opt.get(CONF_UNIT_ID, data.get(CONF_UNIT_ID, DEFAULT_UNIT_ID))
         scan = opt.get(CONF_SCAN_INTERVAL, data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL))
+        fast_scan = opt.get(CONF_FAST_SCAN_INTERVAL, DEFAULT_FAST_SCAN_INTERVAL)
+        slow_scan = opt.get(CONF_SLOW_SCAN_INTERVAL, DEFAULT_SLOW_SCAN_INTERVAL)
+        max_read_gap = opt.get(CONF_MAX_READ_GAP, DEFAULT_MAX_READ_GAP)
+        force_refresh = opt.get(CONF_FORCE_REFRESH_CYCLES, DEFAULT_FORCE_REFRESH_CYCLES)
+        verify_writes = opt.get(CONF_VERIFY_WRITES, DEFAULT_VERIFY_WRITES)
+        pipeline_window = opt.get(CONF_PIPELINE_WINDOW, DEFAULT_PIPELINE_WINDOW)
+        temperature_deadband = opt.get(CONF_TEMPERATURE_DEADBAND, DEFAULT_TEMPERATURE_DEADBAND)
+        fan_speed_deadband = opt.get(CONF_FAN_SPEED_DEADBAND, DEFAULT_FAN_SPEED_DEADBAND)
+        max_age = opt.get(CONF_MAX_AGE, DEFAULT_MAX_AGE)
+        record_traffic = opt.get(CONF_RECORD_TRAFFIC, DEFAULT_RECORD_TRAFFIC)
+        sidecar = opt.get(CONF_SIDECAR, DEFAULT_SIDECAR)
+        sample_interval = opt.get(CONF_SAMPLE_INTERVAL, DEFAULT_SAMPLE_INTERVAL)
+        supply_airflow = opt.get(CONF_SUPPLY_AIRFLOW, DEFAULT_SUPPLY_AIRFLOW)
+        supply_airflow_rpm = opt.get(CONF_SUPPLY_AIRFLOW_RPM, DEFAULT_SUPPLY_AIRFLOW_RPM)
 
         options_schema = vol.Schema(
             {
                 vol.Required(CONF_HOST, default=host): str,
                 vol.Required(CONF_PORT, default=port): int,
+                vol.Required(CONF_UNIT_ID, default=unit_id): vol.All(int, vol.Range(min=0, max=247)),
                 vol.Required(CONF_SCAN_INTERVAL, default=scan): int,
+                vol.Required(CONF_FAST_SCAN_INTERVAL, default=fast_scan): vol.All(int, vol.Range(min=1)),
+                vol.Required(CONF_SLOW_SCAN_INTERVAL, default=slow_scan): vol.All(int, vol.Range(min=1)),
+                vol.Required(CONF_MAX_READ_GAP, default=max_read_gap): vol.All(int, vol.Range(min=0, max=124)),
+                vol.Required(CONF_FORCE_REFRESH_CYCLES, default=force_refresh): vol.All(int, vol.Range(min=0)),
+                vol.Required(CONF_VERIFY_WRITES, default=verify_writes): bool,
+                vol.Required(CONF_PIPELINE_WINDOW, default=pipeline_window): vol.All(int, vol.Range(min=1, max=16)),
+                vol.Required(CONF_TEMPERATURE_DEADBAND, default=temperature_deadband): vol.All(vol.Coerce(float), vol.Range(min=0, max=10)),
+                vol.Required(CONF_FAN_SPEED_DEADBAND, default=fan_speed_deadband): vol.All(vol.Coerce(float), vol.Range(min=0, max=50)),
+                vol.Required(CONF_MAX_AGE, default=max_age): vol.All(int, vol.Range(min=0)),
+                vol.Required(CONF_RECORD_TRAFFIC, default=record_traffic): bool,
+                vol.Optional(CONF_SIDECAR, default=sidecar): str,
+                vol.Required(CONF_SAMPLE_INTERVAL, default=sample_interval): vol.All(int, vol.Range(min=0, max=60)),
+                vol.Required(CONF_SUPPLY_AIRFLOW, default=supply_airflow): vol.All(int, vol.Range(min=0, max=10000)),
+                vol.Required(CONF_SUPPLY_AIRFLOW_RPM, default=supply_airflow_rpm): vol.All(int, vol.Range(min=0, max=10000)),
             }
         )
 
@@ -0,0 +1,26 @@
+"""Pool of Modbus TCP connections shared by every hub behind the same gateway."""
+from .const import DOMAIN, DATA_CONNECTIONS, DEFAULT_PIPELINE_WINDOW
+from .core.connection import RecomModbusConnection
+
+
+def acquire_connection(hass, host, port, pipeline_window=DEFAULT_PIPELINE_WINDOW) -> RecomModbusConnection:
+    """Return the shared connection for host:port, creating it on first use.
+
+    The pipeline window of the first entry that opens the connection applies.
+    """
+    connections = hass.data[DOMAIN].setdefault(DATA_CONNECTIONS, {})
+    key = f"{host}:{port}"
+    connection = connections.get(key)
+    if connection is None:
+        connection = connections[key] = RecomModbusConnection(host, port, pipeline_window)
+    connection.users += 1
+    return connection
+
+
+async def release_connection(hass, connection: RecomModbusConnection):
+    """Drop one user of a shared connection and close it once unused."""
+    connection.users -= 1
+    if connection.users > 0:
+        return
+    hass.data[DOMAIN].get(DATA_CONNECTIONS, {}).pop(connection.key, None)
+    await connection.close()
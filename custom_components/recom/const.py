@@ -1,14 +1,133 @@
-from homeassistant.const import CONF_NAME, CONF_HOST, CONF_PORT, UnitOfTemperature, REVOLUTIONS_PER_MINUTE, PERCENTAGE
+from homeassistant.const import CONF_NAME, CONF_HOST, CONF_PORT, UnitOfTemperature, UnitOfPower, REVOLUTIONS_PER_MINUTE, PERCENTAGE
+
+# Protocol constants live in the Home Assistant independent core
+from .core.const import (
+    DEFAULT_PIPELINE_WINDOW,
+    PIPELINE_MAX_TIMEOUTS,
+    PRIORITY_WRITE,
+    PRIORITY_POLL,
+    MODBUS_INPUT_REGISTER,
+    MODBUS_COIL,
+    MODBUS_DISCRETE_INPUT,
+    MODBUS_HOLDING_REGISTER,
+    DATA_TYPE_S16,
+    DATA_TYPE_U16,
+    DATA_TYPE_S32,
+    DATA_TYPE_U32,
+    DATA_TYPE_F32,
+    WORD_ORDER_BIG,
+    WORD_ORDER_LITTLE,
+    BIT_READ_MAX_GAP,
+    FLEET_MAX_CONCURRENT_POLLS,
+    OFFLINE_BACKOFF_MIN_SECONDS,
+    OFFLINE_BACKOFF_MAX_SECONDS,
+    OFFLINE_BACKOFF_JITTER,
+    OFFLINE_PROBE_ADDRESS,
+)
 
 DOMAIN = "recom"
 DEFAULT_NAME = "recom"
 DEFAULT_PORT = 502
+DEFAULT_UNIT_ID = 1
+
+CONF_UNIT_ID = "unit_id"
+
+CONF_PIPELINE_WINDOW = "pipeline_window"
+
+# Optional sidecar process (python -m core.sidecar) doing the polling and
+# decoding outside Home Assistant: "host:port" or a unix socket path
+CONF_SIDECAR = "sidecar"
+DEFAULT_SIDECAR = ""
+# Reconnect delay after losing the sidecar link
+SIDECAR_RECONNECT_SECONDS = 5
+
+# hass.data[DOMAIN] key holding the per host:port connection pool
+DATA_CONNECTIONS = "_connections"
+# hass.data[DOMAIN] key holding the FleetScheduler that times every hub's polls
+DATA_FLEET = "_fleet"
 DEFAULT_SCAN_INTERVAL = 30
 
-VOLT = "V"
+CONF_FAST_SCAN_INTERVAL = "fast_scan_interval"
+CONF_SLOW_SCAN_INTERVAL = "slow_scan_interval"
+DEFAULT_FAST_SCAN_INTERVAL = 10
+DEFAULT_SLOW_SCAN_INTERVAL = 300
+
+POLL_TIER_FAST = "fast"
+POLL_TIER_NORMAL = "normal"
+POLL_TIER_SLOW = "slow"
+
+CONF_VERIFY_WRITES = "verify_writes"
+DEFAULT_VERIFY_WRITES = False
+# Writes queued within this window are coalesced per address (last value wins)
+WRITE_DEBOUNCE_SECONDS = 0.3
+
+# Burst polling: after a write, or when a fast changing sensor jumps by more
+# than its threshold, the affected entities are read again after MIN seconds,
+# the delay doubling until it reaches the hub's shortest scan interval or the
+# burst is DURATION seconds old
+BURST_MIN_INTERVAL_SECONDS = 2
+BURST_DURATION_SECONDS = 30
+
+# Opt-in log of every request/response, written to <config>/recom_traffic_<name>.jsonl
+# and rotated once it reaches RECORD_MAX_BYTES
+CONF_RECORD_TRAFFIC = "record_traffic"
+DEFAULT_RECORD_TRAFFIC = False
+RECORD_MAX_BYTES = 5 * 1024 * 1024
+RECORD_BACKUP_COUNT = 3
+
+# High resolution sampling: every interval seconds (0 = off) the SAMPLED_SENSORS
+# are read off-cycle into in-memory ring buffers holding SAMPLE_HISTORY_SECONDS.
+# Nothing is published per sample; each hour's min/mean/max is imported into
+# long-term statistics STATISTICS_IMPORT_DELAY_SECONDS after the hour ends.
+CONF_SAMPLE_INTERVAL = "sample_interval"
+DEFAULT_SAMPLE_INTERVAL = 0
+SAMPLE_HISTORY_SECONDS = 2 * 3600
+STATISTICS_IMPORT_DELAY_SECONDS = 30
+# Raw window returned by the get_samples service by default and summed up in diagnostics
+DEFAULT_SAMPLE_WINDOW_SECONDS = 300
+
+# Recovered heat power needs the supply airflow (m3/h, 0 = no power sensor) and
+# the supply fan speed it was measured at (rpm, 0 = airflow doesn't follow the fan)
+CONF_SUPPLY_AIRFLOW = "supply_airflow"
+CONF_SUPPLY_AIRFLOW_RPM = "supply_airflow_rpm"
+DEFAULT_SUPPLY_AIRFLOW = 0
+DEFAULT_SUPPLY_AIRFLOW_RPM = 0
+
+CONF_MAX_READ_GAP = "max_read_gap"
+DEFAULT_MAX_READ_GAP = 8
+CONF_FORCE_REFRESH_CYCLES = "force_refresh_cycles"
+DEFAULT_FORCE_REFRESH_CYCLES = 0
+
+# Last known values persisted across restarts; saved this many seconds after the
+# first change since the last save (and on unload)
+SNAPSHOT_STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 60
+
+# Sensors kept in ring buffers when sampling is on
+SAMPLED_SENSORS = (
+    "IR_CurTEMP_SuAirIn",
+    "IR_CurTEMP_SuAirOut",
+    "IR_CurTEMP_ExAirIn",
+    "IR_CurTEMP_ExAirOut",
+    "IR_SuRPM",
+    "IR_ExRPM",
+)
+
+# Sensors read in a burst after every fan write, to follow the fan ramp
+BURST_AFTER_WRITE_SENSORS = ("IR_SuRPM", "IR_ExRPM")
 
-MODBUS_INPUT_REGISTER = "input_register"
-MODBUS_COIL = "coil"
+# Publish a sensor only once it moves past its deadband, or once the last
+# publish is max age seconds old; sizes of 0 publish every change
+CONF_TEMPERATURE_DEADBAND = "temperature_deadband"
+CONF_FAN_SPEED_DEADBAND = "fan_speed_deadband"
+CONF_MAX_AGE = "max_age"
+DEFAULT_TEMPERATURE_DEADBAND = 0.0
+DEFAULT_FAN_SPEED_DEADBAND = 0.0
+DEFAULT_MAX_AGE = 600
+DEADBAND_ABSOLUTE = "absolute"  # in the sensor's unit
+DEADBAND_RELATIVE = "relative"  # in % of the published value
+
+VOLT = "V"
 
 DONT_DIVIDE_VALUE = 1
 DIVIDE_VALUE_BY_10 = 10
@@ -16,12 +135,17 @@ DIVIDE_VALUE_BY_1000 = 1000
 
 ENTITY_FAN = "fan"
 ENTITY_SENSOR = "sensor"
+ENTITY_BINARY_SENSOR = "binary_sensor"
+ENTITY_DIAGNOSTIC = "diagnostic"
+ENTITY_DERIVED = "derived"
 
 FAN_NAME = "Ventilation Unit"
 FAN_ON_OFF_ADDRESS = 0
 FAN_SPEED_MODE_ADDRESS = 2
 FAN_MANUAL_SPEED_ADDRESS = 17
 FAN_SPEED_RANGE = (0, 100)
+FAN_POLL_TIER = POLL_TIER_NORMAL
+FAN_SPEED_MODE_MANUAL = 255
 FAN_SPEED_MODES = {
     1: "Speed 1",
     2: "Speed 2",
@@ -30,14 +154,75 @@ FAN_SPEED_MODES = {
 }
 
 SENSOR_TYPES = {
-    "IR_CurSelTEMP": ["Temperature Setpoint", 0, UnitOfTemperature.CELSIUS, DIVIDE_VALUE_BY_10, MODBUS_INPUT_REGISTER, "mdi:thermometer"],
-    "IR_CurTEMP_SuAirIn": ["Intake Air Temperature",  1, UnitOfTemperature.CELSIUS, DIVIDE_VALUE_BY_10, MODBUS_INPUT_REGISTER, "mdi:thermometer"],
-    "IR_CurTEMP_SuAirOut": ["Supply Air Temperature", 2, UnitOfTemperature.CELSIUS, DIVIDE_VALUE_BY_10, MODBUS_INPUT_REGISTER, "mdi:thermometer"],
-    "IR_CurTEMP_ExAirIn": ["Extract Air Temperature", 3, UnitOfTemperature.CELSIUS, DIVIDE_VALUE_BY_10, MODBUS_INPUT_REGISTER, "mdi:thermometer"],
-    "IR_CurTEMP_ExAirOut": ["Exhaust Air Temperature",4, UnitOfTemperature.CELSIUS, DIVIDE_VALUE_BY_10, MODBUS_INPUT_REGISTER, "mdi:thermometer"],
-    "IR_SuRPM": ["Supply Fan Speed", 23, REVOLUTIONS_PER_MINUTE, DONT_DIVIDE_VALUE, MODBUS_INPUT_REGISTER, "mdi:speedometer"],
-    "IR_ExRPM": ["Extract Fan Speed", 24, REVOLUTIONS_PER_MINUTE, DONT_DIVIDE_VALUE, MODBUS_INPUT_REGISTER, "mdi:speedometer"],
-    "IR_CurVBAT": ["Internal Battery", 9, VOLT, DIVIDE_VALUE_BY_1000, MODBUS_INPUT_REGISTER, "mdi:battery"],
-    "IR_CurRH_Int": ["Humidity", 10, PERCENTAGE, DONT_DIVIDE_VALUE, MODBUS_INPUT_REGISTER, "mdi:cloud-percent"]
+    "IR_CurSelTEMP": ["Temperature Setpoint", 0, UnitOfTemperature.CELSIUS, DIVIDE_VALUE_BY_10, MODBUS_INPUT_REGISTER, "mdi:thermometer", POLL_TIER_SLOW],
+    "IR_CurTEMP_SuAirIn": ["Intake Air Temperature",  1, UnitOfTemperature.CELSIUS, DIVIDE_VALUE_BY_10, MODBUS_INPUT_REGISTER, "mdi:thermometer", POLL_TIER_NORMAL],
+    "IR_CurTEMP_SuAirOut": ["Supply Air Temperature", 2, UnitOfTemperature.CELSIUS, DIVIDE_VALUE_BY_10, MODBUS_INPUT_REGISTER, "mdi:thermometer", POLL_TIER_FAST],
+    "IR_CurTEMP_ExAirIn": ["Extract Air Temperature", 3, UnitOfTemperature.CELSIUS, DIVIDE_VALUE_BY_10, MODBUS_INPUT_REGISTER, "mdi:thermometer", POLL_TIER_NORMAL],
+    "IR_CurTEMP_ExAirOut": ["Exhaust Air Temperature",4, UnitOfTemperature.CELSIUS, DIVIDE_VALUE_BY_10, MODBUS_INPUT_REGISTER, "mdi:thermometer", POLL_TIER_NORMAL],
+    "IR_SuRPM": ["Supply Fan Speed", 23, REVOLUTIONS_PER_MINUTE, DONT_DIVIDE_VALUE, MODBUS_INPUT_REGISTER, "mdi:speedometer", POLL_TIER_FAST],
+    "IR_ExRPM": ["Extract Fan Speed", 24, REVOLUTIONS_PER_MINUTE, DONT_DIVIDE_VALUE, MODBUS_INPUT_REGISTER, "mdi:speedometer", POLL_TIER_FAST],
+    "IR_CurVBAT": ["Internal Battery", 9, VOLT, DIVIDE_VALUE_BY_1000, MODBUS_INPUT_REGISTER, "mdi:battery", POLL_TIER_SLOW],
+    "IR_CurRH_Int": ["Humidity", 10, PERCENTAGE, DONT_DIVIDE_VALUE, MODBUS_INPUT_REGISTER, "mdi:cloud-percent", POLL_TIER_NORMAL]
     
 }
+
+# Coil/discrete input flags (alarms, filter warnings, heater/bypass states)
+# exposed as binary sensors; all of them are fetched in bulk FC01/FC02 reads:
+# key: [name, address, MODBUS_COIL or MODBUS_DISCRETE_INPUT, device class, poll tier]
+BINARY_SENSOR_TYPES = {
+}
+
+# Sensor key -> [deadband kind, option holding its size, default size]
+SENSOR_DEADBANDS = {
+    "IR_CurSelTEMP": [DEADBAND_ABSOLUTE, CONF_TEMPERATURE_DEADBAND, DEFAULT_TEMPERATURE_DEADBAND],
+    "IR_CurTEMP_SuAirIn": [DEADBAND_ABSOLUTE, CONF_TEMPERATURE_DEADBAND, DEFAULT_TEMPERATURE_DEADBAND],
+    "IR_CurTEMP_SuAirOut": [DEADBAND_ABSOLUTE, CONF_TEMPERATURE_DEADBAND, DEFAULT_TEMPERATURE_DEADBAND],
+    "IR_CurTEMP_ExAirIn": [DEADBAND_ABSOLUTE, CONF_TEMPERATURE_DEADBAND, DEFAULT_TEMPERATURE_DEADBAND],
+    "IR_CurTEMP_ExAirOut": [DEADBAND_ABSOLUTE, CONF_TEMPERATURE_DEADBAND, DEFAULT_TEMPERATURE_DEADBAND],
+    "IR_SuRPM": [DEADBAND_RELATIVE, CONF_FAN_SPEED_DEADBAND, DEFAULT_FAN_SPEED_DEADBAND],
+    "IR_ExRPM": [DEADBAND_RELATIVE, CONF_FAN_SPEED_DEADBAND, DEFAULT_FAN_SPEED_DEADBAND],
+}
+
+# Sensors whose entities start disabled; disabled entities are not polled.
+# Humidity needs an optional sensor and reads as an error without it.
+SENSORS_DISABLED_BY_DEFAULT = {
+    "IR_CurRH_Int",
+}
+
+SERVICE_WRITE_REGISTERS = "write_registers"
+ATTR_ADDRESS = "address"
+ATTR_VALUES = "values"
+ATTR_TABLE = "table"
+SERVICE_GET_SAMPLES = "get_samples"
+ATTR_SECONDS = "seconds"
+
+# Sensors the hub computes from the latest values of other sensors, once per
+# poll snapshot in which one of the inputs changed (see core.derived):
+# key: [name, unit of measurement, icon, input sensor keys in formula order]
+DERIVED_SENSOR_TYPES = {
+    "heat_recovery_efficiency": ["Heat Recovery Efficiency", PERCENTAGE, "mdi:heat-wave", ("IR_CurTEMP_SuAirIn", "IR_CurTEMP_SuAirOut", "IR_CurTEMP_ExAirIn")],
+    "supply_temperature_rise": ["Supply Temperature Rise", UnitOfTemperature.CELSIUS, "mdi:thermometer-plus", ("IR_CurTEMP_SuAirOut", "IR_CurTEMP_SuAirIn")],
+    "extract_temperature_drop": ["Extract Temperature Drop", UnitOfTemperature.CELSIUS, "mdi:thermometer-minus", ("IR_CurTEMP_ExAirIn", "IR_CurTEMP_ExAirOut")],
+    "fan_balance": ["Fan Balance", PERCENTAGE, "mdi:scale-balance", ("IR_SuRPM", "IR_ExRPM")],
+    "recovered_heat_power": ["Recovered Heat Power", UnitOfPower.WATT, "mdi:radiator", ("IR_CurTEMP_SuAirIn", "IR_CurTEMP_SuAirOut", "IR_SuRPM")],
+}
+
+# Hub statistics exposed as diagnostic sensors (disabled by default):
+# key: [name, unit of measurement, icon]
+DIAGNOSTIC_TYPES = {
+    "last_cycle_ms": ["Poll Cycle Duration", "ms", "mdi:timer-outline"],
+    "mean_latency_ms": ["Request Latency", "ms", "mdi:timer-sand"],
+    "skipped_cycles": ["Skipped Poll Cycles", None, "mdi:debug-step-over"],
+    "failed_requests": ["Failed Requests", None, "mdi:alert-circle-outline"],
+    "retries": ["Modbus Retries", None, "mdi:refresh"],
+    "reconnects": ["Modbus Reconnects", None, "mdi:lan-disconnect"],
+    "timeouts": ["Modbus Timeouts", None, "mdi:timer-alert-outline"],
+    "cycle_lag_ms": ["Poll Cycle Lag", "ms", "mdi:clock-alert-outline"],
+}
+
+# Change between two polls (in the sensor's unit) that starts a burst
+BURST_THRESHOLDS = {
+    "IR_CurTEMP_SuAirOut": 1.0,
+    "IR_SuRPM": 100,
+    "IR_ExRPM": 100,
+}
@@ -0,0 +1,7 @@
+"""Modbus polling, decoding and writing without Home Assistant.
+
+Modules in here only import each other (and pymodbus, lazily), so the
+package also runs on its own, e.g. as the sidecar:
+
+    cd custom_components/recom && python -m core.sidecar
+"""
@@ -0,0 +1,232 @@
+"""Modbus TCP connection shared by every unit behind the same gateway."""
+import asyncio
+import inspect
+from typing import NamedTuple, Optional
+
+from .const import DEFAULT_PIPELINE_WINDOW, PIPELINE_MAX_TIMEOUTS, PRIORITY_POLL, PRIORITY_WRITE
+from .pipeline import PipelineError, PipelinedModbusTcpClient, SkippedRequest
+from .scheduler import PrioritySemaphore
+from .stats import ConnectionStats
+
+import logging
+_LOGGER = logging.getLogger(__name__)
+
+# Unit id keyword the hub passes; renamed for pymodbus versions that differ
+DEVICE_KW = "device_id"
+
+
+class UnitNotResponding(ConnectionError):
+    """The unit did not answer, even after reconnecting and retrying once."""
+
+
+class _Pymodbus(NamedTuple):
+    """What the connection needs from pymodbus, imported once per process."""
+
+    client_class: type
+    io_exception: type
+    connection_exception: type
+    device_kw: str
+
+
+_PYMODBUS: Optional[_Pymodbus] = None
+
+
+def _load_pymodbus() -> _Pymodbus:
+    """Import pymodbus and detect its unit id keyword; runs in the executor."""
+    from pymodbus.client import AsyncModbusTcpClient  # 3.x import
+    from pymodbus.exceptions import ModbusIOException, ConnectionException
+
+    # device_id= (>=3.10) or slave=/unit= (older)
+    device_kw = "slave"
+    try:
+        params = inspect.signature(AsyncModbusTcpClient.read_holding_registers).parameters
+        if "device_id" in params:
+            device_kw = "device_id"
+    except Exception:
+        pass
+    return _Pymodbus(AsyncModbusTcpClient, ModbusIOException, ConnectionException, device_kw)
+
+
+async def _async_pymodbus() -> _Pymodbus:
+    global _PYMODBUS
+    if _PYMODBUS is None:
+        _PYMODBUS = await asyncio.get_running_loop().run_in_executor(None, _load_pymodbus)
+    return _PYMODBUS
+
+
+class RecomModbusConnection:
+    """One Modbus TCP socket, multiplexed between all units on a host:port.
+
+    Nothing is imported or opened until the first request, so setting up an
+    entry never waits on pymodbus or on the unit.
+    """
+
+    def __init__(self, host, port, pipeline_window=DEFAULT_PIPELINE_WINDOW):
+        """Initialize the connection."""
+        self.host = host
+        self.port = port
+        self.client = None
+        # Serial mode: one request at a time, writes ahead of queued poll reads
+        self.lock = PrioritySemaphore(1)
+        # Opt-in: keep several requests in flight, matched by transaction id.
+        # Dropped for good (serial pymodbus client) once the peer misbehaves.
+        self.pipeline = None
+        if pipeline_window > 1:
+            self.pipeline = PipelinedModbusTcpClient(host, port, pipeline_window, timeout=5)
+        self._pipeline_timeouts = 0
+        self.users = 0
+        self.stats = ConnectionStats()
+
+    @property
+    def key(self):
+        return f"{self.host}:{self.port}"
+
+    async def _async_client(self) -> _Pymodbus:
+        """Create the pymodbus client on first use."""
+        pymodbus = await _async_pymodbus()
+        if self.client is None:
+            self.client = pymodbus.client_class(host=self.host, port=self.port, timeout=5)
+        return pymodbus
+
+    async def ensure_connected(self) -> bool:
+        """Ensure socket is connected; call connect() if needed."""
+        if self.client.connected:
+            return True
+        try:
+            return bool(await self.client.connect())
+        except Exception as e:
+            _LOGGER.error("Modbus connect failed: %s", e)
+            return False
+
+    def _disable_pipeline(self, reason):
+        _LOGGER.warning(
+            "Modbus peer %s does not handle pipelined requests (%s); falling back to serial mode",
+            self.key, reason
+        )
+        self.pipeline.close()
+        self.pipeline = None
+
+    async def _call_pipelined(self, method, *args, priority=PRIORITY_POLL, **kwargs):
+        """Send one request over the pipelined client; retry once, reconnecting on connection errors."""
+        client = self.pipeline
+        for attempt in range(2):
+            try:
+                res = await getattr(client, method)(*args, priority=priority, **kwargs)
+                self._pipeline_timeouts = 0
+                return res
+            except asyncio.TimeoutError as e:
+                self.stats.timeouts += 1
+                # A unit that is down answers nothing; only a unit that answers
+                # later requests but drops this one points at pipelining
+                if isinstance(e, SkippedRequest):
+                    self._pipeline_timeouts += 1
+                    if self._pipeline_timeouts >= PIPELINE_MAX_TIMEOUTS:
+                        raise PipelineError(f"{self._pipeline_timeouts} skipped requests in a row") from e
+                if attempt:
+                    raise UnitNotResponding(f"Modbus retry failed: {e}") from e
+                # The socket is fine and other requests are still in flight on
+                # it; a late reply to this one is dropped by the client
+                _LOGGER.warning("Modbus request timed out: %s. Retrying once...", e)
+                self.stats.retries += 1
+                continue
+            except (OSError, ConnectionError) as e:
+                if self.pipeline is not client:
+                    # Closed by the fallback to serial mode; retry over there
+                    raise PipelineError("Pipelining disabled") from e
+                error = e
+            if attempt:
+                raise UnitNotResponding(f"Modbus retry failed: {error}") from error
+            _LOGGER.warning("Modbus connection error: %s. Reconnecting and retrying once...", error)
+            self.stats.retries += 1
+            self.stats.reconnects += 1
+            client.close()
+
+    async def call_with_retry(self, method, *args, priority=PRIORITY_POLL, **kwargs):
+        """Call a Modbus client method by name; on connection errors reconnect and retry once.
+
+        Raises UnitNotResponding when the unit can't be reached or doesn't
+        answer; any other failure is logged and returns None.
+
+        Requests waiting for the connection are served by ``priority``
+        (PRIORITY_WRITE before PRIORITY_POLL), then in order of arrival.
+        """
+        if self.pipeline is not None:
+            try:
+                return await self._call_pipelined(method, *args, priority=priority, **kwargs)
+            except PipelineError as e:
+                if self.pipeline is not None:
+                    self._disable_pipeline(e)
+
+        pymodbus = await self._async_client()
+        if pymodbus.device_kw != DEVICE_KW and DEVICE_KW in kwargs:
+            kwargs[pymodbus.device_kw] = kwargs.pop(DEVICE_KW)
+        func = getattr(self.client, method)
+        async with self.lock.slot(priority):
+            async def _reconnect_and_retry():
+                self.stats.retries += 1
+                self.stats.reconnects += 1
+                try:
+                    self.client.close()
+                except Exception:
+                    pass
+                if not await self.ensure_connected():
+                    raise UnitNotResponding(f"Cannot reconnect to {self.key}")
+                try:
+                    return await func(*args, **kwargs)
+                except Exception as e2:
+                    raise UnitNotResponding(f"Modbus retry failed: {e2}") from e2
+
+            try:
+                await self.ensure_connected()
+                return await func(*args, **kwargs)
+
+            # Direct low-level socket/connection errors
+            except (BrokenPipeError, OSError, ConnectionError, pymodbus.connection_exception, asyncio.TimeoutError) as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    self.stats.timeouts += 1
+                _LOGGER.warning("Modbus connection error: %s. Reconnecting and retrying once...", e)
+                return await _reconnect_and_retry()
+
+            # ModbusIOException may wrap connection errors
+            except pymodbus.io_exception as e:
+                inner = getattr(e, "__cause__", None) or getattr(e, "__context__", None)
+                disconnected = getattr(self.client, "connected", True) is False
+                if isinstance(inner, (BrokenPipeError, OSError, ConnectionError)) or disconnected:
+                    _LOGGER.warning("Modbus IO error (connection-related): %s. Reconnecting and retrying once...", e)
+                    return await _reconnect_and_retry()
+                if "No response" in str(e):
+                    # pymodbus reports an unanswered request this way, after its own retries
+                    self.stats.timeouts += 1
+                    raise UnitNotResponding(str(e)) from e
+                _LOGGER.warning("Modbus IO error (non-connection): %s", e)
+                return None
+
+            # Anything else: suppress & log once
+            except Exception as e:
+                _LOGGER.warning("Unexpected Modbus error (suppressed): %s", e)
+                return None
+
+    async def connect(self):
+        """Connect client."""
+        if self.pipeline is not None:
+            try:
+                await self.pipeline.connect()
+            except Exception as e:
+                _LOGGER.error("Modbus connect failed: %s", e)
+            return
+        await self._async_client()
+        async with self.lock.slot(PRIORITY_POLL):
+            await self.ensure_connected()
+
+    async def close(self):
+        """Disconnect client."""
+        if self.pipeline is not None:
+            self.pipeline.close()
+        if self.client is None:
+            return
+        async with self.lock.slot(PRIORITY_WRITE):
+            try:
+                self.client.close()
+            except Exception as e:
+                _LOGGER.debug("Error on close: %s", e)
+
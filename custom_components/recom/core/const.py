@@ -0,0 +1,38 @@
+"""Modbus protocol constants shared by the integration and the sidecar."""
+
+# 1 = classic one-request-at-a-time; >1 keeps that many requests in flight
+DEFAULT_PIPELINE_WINDOW = 1
+# Consecutive requests a unit skips in pipelined mode before falling back to serial mode
+PIPELINE_MAX_TIMEOUTS = 3
+
+# Request priorities on a shared connection; lower is served first
+PRIORITY_WRITE = 0
+PRIORITY_POLL = 1
+
+MODBUS_INPUT_REGISTER = "input_register"
+MODBUS_COIL = "coil"
+MODBUS_DISCRETE_INPUT = "discrete_input"
+MODBUS_HOLDING_REGISTER = "holding_register"
+
+# Register data types; SENSOR_TYPES entries default to DATA_TYPE_S16
+DATA_TYPE_S16 = "int16"
+DATA_TYPE_U16 = "uint16"
+DATA_TYPE_S32 = "int32"
+DATA_TYPE_U32 = "uint32"
+DATA_TYPE_F32 = "float32"
+# Order of the two registers of a 32-bit value
+WORD_ORDER_BIG = "big"  # high word first
+WORD_ORDER_LITTLE = "little"  # low word first
+
+# Unused coils/discrete inputs bridged to merge bit reads into one request
+BIT_READ_MAX_GAP = 64
+
+# Poll cycles of different units allowed to run at the same time
+FLEET_MAX_CONCURRENT_POLLS = 4
+
+# Offline circuit breaker: probe delay doubles from MIN to MAX, +/- JITTER share
+OFFLINE_BACKOFF_MIN_SECONDS = 5
+OFFLINE_BACKOFF_MAX_SECONDS = 300
+OFFLINE_BACKOFF_JITTER = 0.2
+# Input register read as the reconnect probe (temperature setpoint)
+OFFLINE_PROBE_ADDRESS = 0
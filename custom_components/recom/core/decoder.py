@@ -0,0 +1,255 @@
+"""Register map compiled into decode plans.
+
+``SENSOR_TYPES`` is compiled once into ``RegisterSpec`` tuples. For a set of
+sensor entities the hub builds a ``DecodePlan``: the block reads to issue and,
+per block, a precompiled ``struct`` reader for every value in it. Values are
+unpacked straight from the big-endian register bytes of the response, so a
+block decodes without an intermediate list of register words.
+"""
+import struct
+from typing import NamedTuple, Optional
+
+from .const import (
+    DATA_TYPE_S16,
+    DATA_TYPE_U16,
+    DATA_TYPE_S32,
+    DATA_TYPE_U32,
+    DATA_TYPE_F32,
+    WORD_ORDER_BIG,
+    MODBUS_INPUT_REGISTER,
+    MODBUS_HOLDING_REGISTER,
+    MODBUS_COIL,
+    MODBUS_DISCRETE_INPUT,
+    BIT_READ_MAX_GAP,
+)
+from .planner import MAX_BITS_PER_READ, ReadBlock, plan_reads
+
+# Data type -> struct format of the value in high-word-first order
+DATA_TYPE_FORMATS = {
+    DATA_TYPE_S16: ">h",
+    DATA_TYPE_U16: ">H",
+    DATA_TYPE_S32: ">i",
+    DATA_TYPE_U32: ">I",
+    DATA_TYPE_F32: ">f",
+}
+# Register table -> client method reading it
+REGISTER_READ_METHODS = {
+    MODBUS_INPUT_REGISTER: "read_input_registers",
+    MODBUS_HOLDING_REGISTER: "read_holding_registers",
+}
+# Bit table -> client method reading it
+BIT_READ_METHODS = {
+    MODBUS_COIL: "read_coils",
+    MODBUS_DISCRETE_INPUT: "read_discrete_inputs",
+}
+# Low word first 32-bit values are read as two words and reassembled
+_SWAPPED = struct.Struct(">HH")
+
+
+def register_buffer(res) -> memoryview:
+    """Return the register bytes of a read response without copying where possible.
+
+    Pipelined responses keep their raw PDU; pymodbus responses only expose
+    the decoded words, which are packed back in one call.
+    """
+    pdu = getattr(res, "pdu", None)
+    if pdu is not None:
+        return memoryview(pdu)[2:2 + pdu[1]]
+    registers = res.registers
+    return memoryview(struct.pack(f">{len(registers)}H", *registers))
+
+
+class RegisterSpec(NamedTuple):
+    """One SENSOR_TYPES entry."""
+
+    key: str
+    name: str
+    address: int
+    unit: Optional[str]
+    divide_by: float
+    modbus_type: str
+    icon: str
+    poll_tier: str
+    data_type: str = DATA_TYPE_S16
+    word_order: str = WORD_ORDER_BIG
+    # Bit of a status word to extract (data type uint16)
+    bit: Optional[int] = None
+    enabled_default: bool = True
+
+
+def compile_register_map(sensor_types, disabled_by_default=()) -> tuple[RegisterSpec, ...]:
+    """Turn the positional SENSOR_TYPES lists into RegisterSpecs, ordered by address."""
+    specs = (
+        RegisterSpec(key, *info)._replace(enabled_default=key not in disabled_by_default)
+        for key, info in sensor_types.items()
+    )
+    return tuple(sorted(specs, key=lambda spec: (spec.modbus_type, spec.address)))
+
+
+class _Field(NamedTuple):
+    slot: int
+    offset: int
+    words: int
+    reader: struct.Struct
+    data_type: str
+    swapped: bool
+    bit: Optional[int]
+    divide_by: float
+
+
+def _field(slot, entity, block):
+    data_type = getattr(entity, "data_type", DATA_TYPE_S16)
+    words = struct.calcsize(DATA_TYPE_FORMATS[data_type]) // 2
+    swapped = words == 2 and getattr(entity, "word_order", WORD_ORDER_BIG) != WORD_ORDER_BIG
+    return _Field(
+        slot,
+        entity.address - block.start,
+        words,
+        _SWAPPED if swapped else struct.Struct(DATA_TYPE_FORMATS[data_type]),
+        data_type,
+        swapped,
+        getattr(entity, "bit", None),
+        getattr(entity, "divide_value_by", 1),
+    )
+
+
+def scaled_value(raw, bit=None, divide_by=1):
+    """Turn a raw register value into the entity value: the bit of a status word, scaled."""
+    if raw is None:
+        return None
+    if bit is not None:
+        raw = raw >> bit & 1
+    return raw / divide_by
+
+
+def _unswap(data_type, high, low):
+    """Rebuild a low-word-first 32-bit value."""
+    packed = struct.pack(">HH", high, low)
+    return struct.unpack(DATA_TYPE_FORMATS[data_type], packed)[0]
+
+
+class DecodePlan:
+    """Block reads and decode tables for a fixed set of sensor entities."""
+
+    def __init__(self, entities, max_gap, unmapped=()):
+        """Compile the plan; ``entities`` need address, modbus_type and divide_value_by.
+
+        No block spans the ``(table, address)`` keys in ``unmapped``.
+        """
+        self.entities = [x for x in entities if x.modbus_type in REGISTER_READ_METHODS]
+        self.keys = [(x.modbus_type, x.address) for x in self.entities]
+
+        # (client method, block) per request, with its table, the fields it
+        # decodes and the register addresses it actually needs (for single
+        # register fallback)
+        self.reads: list[tuple[str, ReadBlock]] = []
+        self.tables: list[str] = []
+        self.fields: list[list[_Field]] = []
+        self.addresses: list[list[int]] = []
+        for table, method in REGISTER_READ_METHODS.items():
+            slots = [slot for slot, entity in enumerate(self.entities) if entity.modbus_type == table]
+            widths = {}
+            for slot in slots:
+                entity = self.entities[slot]
+                count = struct.calcsize(DATA_TYPE_FORMATS[getattr(entity, "data_type", DATA_TYPE_S16)]) // 2
+                widths[entity.address] = max(widths.get(entity.address, 1), count)
+            skip = [address for skip_table, address in unmapped if skip_table == table]
+            for block in plan_reads(widths, max_gap, widths=widths, unmapped=skip):
+                fields = [
+                    _field(slot, self.entities[slot], block)
+                    for slot in slots
+                    if block.start <= self.entities[slot].address <= block.end
+                ]
+                self.reads.append((method, block))
+                self.tables.append(table)
+                self.fields.append(fields)
+                self.addresses.append([
+                    block.start + field.offset + word for field in fields for word in range(field.words)
+                ])
+
+    def decode(self, responses):
+        """Decode one ``(buffer, present)`` pair (or None) per read into flat raw and value lists.
+
+        ``buffer`` holds the block's big-endian register bytes; ``present`` is
+        the set of word offsets that were read, or None when all were. Values
+        with missing words decode to None. Raw values (before scaling, and
+        the whole status word for bit entities, so entities sharing a word
+        agree on it) drive change detection.
+        """
+        raw = [None] * len(self.entities)
+        values = [None] * len(self.entities)
+        for index, response in enumerate(responses):
+            if response is None:
+                continue
+            buffer, present = response
+            for slot, offset, words, reader, data_type, swapped, bit, divide_by in self.fields[index]:
+                if present is not None and not present.issuperset(range(offset, offset + words)):
+                    continue
+                if swapped:
+                    low, high = reader.unpack_from(buffer, 2 * offset)
+                    value = _unswap(data_type, high, low)
+                else:
+                    value = reader.unpack_from(buffer, 2 * offset)[0]
+                raw[slot] = value
+                values[slot] = scaled_value(value, bit, divide_by)
+        return raw, values
+
+
+class BitPlan:
+    """Bulk FC01/FC02 reads and bit offsets for a fixed set of coil/discrete input entities."""
+
+    def __init__(self, entities, max_gap=BIT_READ_MAX_GAP, unmapped=()):
+        """Compile the plan; ``entities`` need address and modbus_type.
+
+        No block spans the ``(table, address)`` keys in ``unmapped``.
+        """
+        self.entities = [x for x in entities if x.modbus_type in BIT_READ_METHODS]
+        self.keys = [(x.modbus_type, x.address) for x in self.entities]
+        # (client method, block) per request, its table, the (slot, bit offset)
+        # pairs it serves and the offsets it actually needs (for single bit fallback)
+        self.reads: list[tuple[str, ReadBlock]] = []
+        self.tables: list[str] = []
+        self.fields: list[list[tuple[int, int]]] = []
+        self.offsets: list[list[int]] = []
+        for table, method in BIT_READ_METHODS.items():
+            slots = [slot for slot, entity in enumerate(self.entities) if entity.modbus_type == table]
+            skip = [address for skip_table, address in unmapped if skip_table == table]
+            addresses = (self.entities[slot].address for slot in slots)
+            for block in plan_reads(addresses, max_gap, MAX_BITS_PER_READ, unmapped=skip):
+                self.reads.append((method, block))
+                self.tables.append(table)
+                fields = [
+                    (slot, self.entities[slot].address - block.start)
+                    for slot in slots
+                    if block.start <= self.entities[slot].address <= block.end
+                ]
+                self.fields.append(fields)
+                self.offsets.append(sorted({offset for _slot, offset in fields}))
+
+    def decode(self, responses):
+        """Unpack one read response (or None) per request into a flat list of bools.
+
+        A request may also be answered by an offset -> bool dict of single
+        reads; offsets missing from it decode to None.
+        """
+        values = [None] * len(self.entities)
+        for index, res in enumerate(responses):
+            if isinstance(res, dict):
+                for slot, offset in self.fields[index]:
+                    values[slot] = res.get(offset)
+                continue
+            if res is None or res.isError():
+                continue
+            pdu = getattr(res, "pdu", None)
+            if pdu is not None:
+                # Pipelined responses: test the bits in the raw PDU, LSB first
+                size = pdu[1]
+                for slot, offset in self.fields[index]:
+                    if offset >> 3 < size:
+                        values[slot] = bool(pdu[2 + (offset >> 3)] >> (offset & 7) & 1)
+                continue
+            bits = getattr(res, "bits", None) or []
+            for slot, offset in self.fields[index]:
+                if offset < len(bits):
+                    values[slot] = bool(bits[offset])
+        return values
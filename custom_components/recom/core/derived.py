@@ -0,0 +1,57 @@
+"""Values computed from other sensors of the same poll snapshot.
+
+Every formula takes its input values in the order DERIVED_SENSOR_TYPES lists
+them and returns None where the result would be meaningless.
+"""
+from functools import partial
+
+# Air density (kg/m3) times specific heat capacity (J/(kg K)) per 3600 s/h:
+# W per m3/h of airflow and K of temperature rise
+AIR_HEAT_W_PER_M3H_K = 1.2 * 1005 / 3600
+# Below this extract/intake difference (K) the efficiency is mostly sensor noise
+EFFICIENCY_MIN_DELTA = 2.0
+
+
+def heat_recovery_efficiency(intake, supply, extract):
+    """Supply side temperature ratio in %: the share of the extract/intake gap the exchanger closes."""
+    if abs(extract - intake) < EFFICIENCY_MIN_DELTA:
+        return None
+    return round((supply - intake) / (extract - intake) * 100, 1)
+
+
+def temperature_difference(first, second):
+    return round(first - second, 1)
+
+
+def fan_balance(supply_rpm, extract_rpm):
+    """Supply fan speed in % of the extract fan speed."""
+    if not extract_rpm:
+        return None
+    return round(supply_rpm / extract_rpm * 100, 1)
+
+
+def recovered_heat_power(intake, supply, supply_rpm, airflow, airflow_rpm):
+    """Heat (W) the supply air picks up in the exchanger.
+
+    ``airflow`` (m3/h) is the supply airflow at ``airflow_rpm``; the actual
+    airflow follows the fan speed linearly (fan law). Without ``airflow_rpm``
+    it is taken as constant.
+    """
+    if airflow_rpm:
+        airflow = airflow * supply_rpm / airflow_rpm
+    return round(AIR_HEAT_W_PER_M3H_K * airflow * (supply - intake))
+
+
+def derived_formulas(airflow=0, airflow_rpm=0) -> dict:
+    """Derived sensor key -> formula; recovered heat power only with an airflow."""
+    formulas = {
+        "heat_recovery_efficiency": heat_recovery_efficiency,
+        "supply_temperature_rise": temperature_difference,
+        "extract_temperature_drop": temperature_difference,
+        "fan_balance": fan_balance,
+    }
+    if airflow:
+        formulas["recovered_heat_power"] = partial(
+            recovered_heat_power, airflow=airflow, airflow_rpm=airflow_rpm
+        )
+    return formulas
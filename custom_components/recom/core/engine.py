@@ -0,0 +1,421 @@
+"""Polling, decoding and writing without Home Assistant.
+
+The block read and write helpers take the function that sends a request.
+``RecomEngine`` runs a unit's poll cycles on top of them, for the hub in
+process and for the sidecar alike.
+"""
+import asyncio
+import random
+import struct
+import time
+from typing import NamedTuple, Optional
+
+from .connection import DEVICE_KW, UnitNotResponding
+from .const import (
+    DATA_TYPE_S16,
+    WORD_ORDER_BIG,
+    MODBUS_COIL,
+    PRIORITY_WRITE,
+    OFFLINE_BACKOFF_MIN_SECONDS,
+    OFFLINE_BACKOFF_MAX_SECONDS,
+    OFFLINE_BACKOFF_JITTER,
+    OFFLINE_PROBE_ADDRESS,
+)
+from .decoder import BitPlan, DecodePlan, register_buffer
+from .planner import MAX_COILS_PER_WRITE, MAX_REGISTERS_PER_WRITE, plan_writes
+from .stats import HubStats
+
+import logging
+_LOGGER = logging.getLogger(__name__)
+
+
+async def read_register_blocks(call, plan, rejected=None, **id_kwargs):
+    """Read the input/holding register blocks of a decode plan.
+
+    Returns one ``(buffer, present)`` pair (or None) per read, as
+    DecodePlan.decode expects. Blocks the unit rejects (e.g. because the
+    gap between two addresses contains an unmapped register) fall back to
+    single reads of the registers the plan needs. The ``(table, address)``
+    keys to keep future blocks off (the gap and any register rejected on
+    its own) are added to the ``rejected`` set.
+    """
+    # Issued together so a pipelined connection can keep them all in flight
+    responses = await asyncio.gather(*(
+        call(method, address=block.start, count=block.count, **id_kwargs)
+        for method, block in plan.reads
+    ))
+    buffers = []
+    for index, ((method, block), res) in enumerate(zip(plan.reads, responses)):
+        if res is not None and not res.isError():
+            buffer = register_buffer(res)
+            if len(buffer) >= 2 * block.count:
+                buffers.append((buffer, None))
+                continue
+        buffers.append(None)
+        if res is None or block.count == 1:
+            continue
+        _LOGGER.debug("Block read %s+%s failed, reading registers one by one", block.start, block.count)
+        buffer = bytearray(2 * block.count)
+        present = set()
+        failed = set(range(block.start, block.end + 1)).difference(plan.addresses[index])
+        for address in plan.addresses[index]:
+            res = await call(method, address=address, count=1, **id_kwargs)
+            if res is not None and not res.isError() and getattr(res, "registers", None):
+                offset = address - block.start
+                struct.pack_into(">H", buffer, 2 * offset, res.registers[0])
+                present.add(offset)
+            elif res is not None:
+                failed.add(address)
+        buffers[index] = (buffer, present)
+        if rejected is not None:
+            rejected.update((plan.tables[index], address) for address in failed)
+    return buffers
+
+
+async def read_bit_blocks(call, plan, rejected=None, **id_kwargs):
+    """Send the bulk FC01/FC02 reads of a bit plan; returns the responses for BitPlan.decode.
+
+    Blocks the unit rejects (e.g. because the gap between two addresses
+    contains an unmapped coil) fall back to single reads of the bits the plan
+    needs, returned as an offset -> bool dict in place of the response. As
+    for registers, the keys to keep future blocks off go into ``rejected``.
+    """
+    responses = list(await asyncio.gather(*(
+        call(method, address=block.start, count=block.count, **id_kwargs)
+        for method, block in plan.reads
+    )))
+    for index, ((method, block), res) in enumerate(zip(plan.reads, responses)):
+        if res is None or not res.isError() or block.count == 1:
+            continue
+        _LOGGER.debug("Bit read %s+%s failed, reading bits one by one", block.start, block.count)
+        bits = {}
+        failed = set(range(block.count)).difference(plan.offsets[index])
+        for offset in plan.offsets[index]:
+            res = await call(method, address=block.start + offset, count=1, **id_kwargs)
+            if res is not None and not res.isError() and res.bits:
+                bits[offset] = bool(res.bits[0])
+            elif res is not None:
+                failed.add(offset)
+        responses[index] = bits
+        if rejected is not None:
+            rejected.update((plan.tables[index], block.start + offset) for offset in failed)
+    return responses
+
+
+async def send_writes(call, table, values, **id_kwargs):
+    """Write address -> value to a table in as few requests as possible.
+
+    Returns address -> whether the request carrying it succeeded.
+    """
+    coils = table == MODBUS_COIL
+    results = {}
+    for block in plan_writes(values, MAX_COILS_PER_WRITE if coils else MAX_REGISTERS_PER_WRITE):
+        if len(block.values) == 1:
+            # Single writes keep FC05/FC06 for units without FC15/FC16
+            write_func = "write_coil" if coils else "write_register"
+            res = await call(write_func, block.start, block.values[0], priority=PRIORITY_WRITE, **id_kwargs)
+        else:
+            write_func = "write_coils" if coils else "write_registers"
+            values_arg = [bool(v) for v in block.values] if coils else list(block.values)
+            res = await call(write_func, block.start, values_arg, priority=PRIORITY_WRITE, **id_kwargs)
+        ok = res is not None and not res.isError()
+        for offset in range(len(block.values)):
+            results[block.start + offset] = ok
+    return results
+
+
+class Point(NamedTuple):
+    """One register or bit the engine polls; shaped like the entities plans are built from."""
+
+    modbus_type: str
+    address: int
+    data_type: str = DATA_TYPE_S16
+    word_order: str = WORD_ORDER_BIG
+    bit: Optional[int] = None
+    poll_tier: Optional[str] = None
+
+    @property
+    def key(self):
+        return (self.modbus_type, self.address)
+
+
+class RecomEngine:
+    """Poll, decode and write the points of one unit.
+
+    The one implementation of a unit's poll cycle, driven by the hub in
+    process and by the sidecar: poll tiers, read plans, change detection,
+    forced refreshes, write verification and the offline circuit breaker.
+
+    Every poll hands ``on_delta(delta, available, forced)`` the raw values
+    that changed, as ``{(table, address): value}`` (None for a failed read),
+    or every value it read in a forced cycle. Losing and regaining the unit
+    is reported as an empty delta. Scaling and publishing are left to the
+    receiver.
+    """
+
+    def __init__(
+        self,
+        connection,
+        points,
+        tier_intervals,
+        max_read_gap,
+        unit_id,
+        on_delta,
+        name=None,
+        force_refresh_cycles=0,
+        verify_writes=False,
+        recorder=None,
+    ):
+        self._connection = connection
+        self._name = name or f"unit {unit_id}"
+        self._tier_intervals = dict(tier_intervals)
+        # Cycles run at the shortest tier interval and read the tiers that are due
+        self.tick = min(self._tier_intervals.values())
+        self._tier_next = {}
+        self._max_read_gap = max_read_gap
+        self._id_kwargs = {DEVICE_KW: unit_id}
+        self._on_delta = on_delta
+        # Every n-th cycle reports all values it read, changed or not (0 = never)
+        self._force_refresh_cycles = force_refresh_cycles
+        self._cycle = 0
+        self._verify_writes = verify_writes
+        # (table, address) -> written value to confirm on the next poll
+        self._unverified = {}
+        # Optional TrafficRecorder logging every request for later replay
+        self._recorder = recorder
+        # (plan type, frozenset of tiers, frozenset of keys) -> plan
+        self._plans = {}
+        # (table, address) keys the unit rejected; plans keep their blocks off them
+        self._unmapped = frozenset()
+        # (table, address) -> raw value of the previous poll
+        self._raw = {}
+        self.set_points(points)
+        # Circuit breaker: once the unit stops answering, the running cycle is
+        # cancelled and only a single probe read is sent per backoff step.
+        self.available = True
+        self.backoff = 0
+        self._probe_at = 0
+        self._cycle_task = None
+        self.stats = HubStats()
+        self._created = time.perf_counter()
+
+    def set_points(self, points):
+        """Replace the points to poll; values of dropped points are forgotten."""
+        self._points = list(points)
+        self._keys = {point.key for point in self._points}
+        self._plans.clear()
+        for key in self._raw.keys() - self._keys:
+            del self._raw[key]
+        for key in self._unverified.keys() - self._keys:
+            del self._unverified[key]
+
+    async def _call(self, method, *args, **kwargs):
+        """Send one request; returns None for a failed request.
+
+        Only a unit that doesn't answer at all opens the circuit breaker;
+        while it is open, requests return None without touching the connection.
+        """
+        if not self.available:
+            return None
+        start = time.perf_counter()
+        lost = None
+        try:
+            res = await self._connection.call_with_retry(method, *args, **kwargs)
+        except UnitNotResponding as e:
+            res, lost = None, e
+        ms = (time.perf_counter() - start) * 1000
+        self.stats.record_request(method, ms, res is None or res.isError())
+        if self._recorder is not None:
+            self._recorder.record(method, args, kwargs, res, ms, lost is not None)
+        if lost is not None:
+            # The connection already reconnected and retried; the unit is gone.
+            # Any other failure (None) only fails this request.
+            _LOGGER.debug("Recom %s: %s", self._name, lost)
+            self._set_offline()
+        return res
+
+    def _set_offline(self):
+        """Open the circuit breaker and abort the running poll cycle."""
+        if not self.available:
+            return
+        self.available = False
+        self.stats.offline_trips += 1
+        self._schedule_probe()
+        _LOGGER.warning(
+            "Recom %s is not responding; retrying in %.0f s", self._name, self._probe_at - time.monotonic()
+        )
+        if self._cycle_task is not None:
+            self._cycle_task.cancel()
+        self._on_delta({}, False, False)
+
+    def _schedule_probe(self):
+        """Back off exponentially, with jitter so units behind one gateway spread out."""
+        if self.backoff:
+            self.backoff = min(self.backoff * 2, OFFLINE_BACKOFF_MAX_SECONDS)
+        else:
+            self.backoff = OFFLINE_BACKOFF_MIN_SECONDS
+        jitter = random.uniform(-OFFLINE_BACKOFF_JITTER, OFFLINE_BACKOFF_JITTER)
+        self._probe_at = time.monotonic() + self.backoff * (1 + jitter)
+
+    async def _probe(self) -> bool:
+        """Send one cheap read; close the breaker if the unit answers."""
+        try:
+            await self._connection.call_with_retry(
+                "read_input_registers", address=OFFLINE_PROBE_ADDRESS, count=1, **self._id_kwargs
+            )
+        except UnitNotResponding:
+            self._schedule_probe()
+            _LOGGER.debug("Recom %s still offline; next probe in %.0f s", self._name, self.backoff)
+            return False
+        _LOGGER.info("Recom %s is back online", self._name)
+        self.available = True
+        self.backoff = 0
+        # Everything is stale: read all tiers now
+        self._tier_next = {}
+        self._on_delta({}, True, False)
+        return True
+
+    def _plan(self, plan_type, tiers, keys, *args):
+        """Return the (cached) plan for the points of ``tiers`` or ``keys``; both None selects all."""
+        plan = self._plans.get((plan_type, tiers, keys))
+        if plan is None:
+            plan = self._plans[(plan_type, tiers, keys)] = plan_type([
+                x for x in self._points
+                if (tiers is None and keys is None)
+                or (tiers is not None and x.poll_tier in tiers)
+                or (keys is not None and x.key in keys)
+            ], *args, unmapped=self._unmapped)
+        return plan
+
+    def _due_tiers(self, now):
+        # Half a tick of slack so timer jitter doesn't push a tier a full tick late
+        due = set()
+        for tier, interval in self._tier_intervals.items():
+            if self._tier_next.get(tier, 0) <= now + self.tick / 2:
+                due.add(tier)
+                self._tier_next[tier] = now + interval
+        return frozenset(due)
+
+    async def cycle(self):
+        """Poll the due tiers and any writes awaiting verification.
+
+        While the unit is offline only the probe is sent, once per backoff step.
+        """
+        if not self._points:
+            return
+        if not self.available:
+            if time.monotonic() < self._probe_at or not await self._probe():
+                return
+        tiers = self._due_tiers(time.monotonic())
+        if not tiers and not self._unverified:
+            return
+
+        start = time.perf_counter()
+        self._cycle += 1
+        forced = bool(self._force_refresh_cycles and self._cycle % self._force_refresh_cycles == 0)
+        self._cycle_task = asyncio.ensure_future(
+            self.poll(tiers, frozenset(self._unverified) or None, forced)
+        )
+        try:
+            await self._cycle_task
+        except asyncio.CancelledError:
+            if self.available or asyncio.current_task().cancelling():
+                raise
+            # Aborted by the circuit breaker
+            return
+        finally:
+            self._cycle_task = None
+        now = time.perf_counter()
+        if self.stats.first_poll_ms is None:
+            self.stats.first_poll_ms = (now - self._created) * 1000
+        self.stats.record_cycle((now - start) * 1000)
+
+    async def poll(self, tiers=None, keys=None, forced=False):
+        """Read the points of ``tiers`` or ``keys`` (both None = all) and report what changed."""
+        snapshot = await self._read(
+            self._plan(DecodePlan, tiers, keys, self._max_read_gap), self._plan(BitPlan, tiers, keys)
+        )
+        if not self.available:
+            # Reported by the breaker; whatever was read is incomplete
+            return
+        self._verify(snapshot)
+        delta = {
+            key: value for key, value in snapshot.items()
+            if forced or key not in self._raw or self._raw[key] != value
+        }
+        self._raw.update(snapshot)
+        self._on_delta(delta, True, forced)
+
+    async def read(self, keys):
+        """Read the points of ``keys`` without comparing or reporting them; returns their raw values."""
+        return await self._read(
+            self._plan(DecodePlan, None, keys, self._max_read_gap), self._plan(BitPlan, None, keys)
+        )
+
+    async def _read(self, register_plan, bit_plan):
+        rejected = set()
+        buffers, responses = await asyncio.gather(
+            read_register_blocks(self._call, register_plan, rejected, **self._id_kwargs),
+            read_bit_blocks(self._call, bit_plan, rejected, **self._id_kwargs),
+        )
+        if not rejected <= self._unmapped:
+            # Re-plan so the next cycles don't send the rejected blocks again
+            _LOGGER.debug("Recom %s rejected %s; splitting reads around them", self._name, sorted(rejected))
+            self._unmapped |= rejected
+            self._plans.clear()
+        snapshot = dict(zip(register_plan.keys, register_plan.decode(buffers)[0]))
+        snapshot.update(zip(bit_plan.keys, bit_plan.decode(responses)))
+        return snapshot
+
+    def _verify(self, snapshot):
+        """Compare read-back values against the writes they should confirm."""
+        for key in self._unverified.keys() & snapshot.keys():
+            expected = self._unverified.pop(key)
+            actual = snapshot[key]
+            if actual is None:
+                continue
+            if key[0] == MODBUS_COIL:
+                matches = bool(actual) == bool(expected)
+            else:
+                matches = int(actual) == int(expected)
+            if not matches:
+                _LOGGER.warning(
+                    "Write to %s %s of %s not confirmed: wrote %s, unit reports %s",
+                    key[0], key[1], self._name, expected, actual
+                )
+
+    async def run(self, phase=0.0, slots=None):
+        """Run a cycle now and then every tick, ``phase`` seconds into it, until cancelled.
+
+        Engines sharing ``slots`` (an asyncio.Semaphore) wait for a free slot
+        before each cycle, capping how many units poll at once.
+        """
+        due = time.monotonic()
+        while True:
+            try:
+                if slots is None:
+                    await self.cycle()
+                else:
+                    async with slots:
+                        await self.cycle()
+            except Exception as e:
+                self.stats.cycle_errors += 1
+                _LOGGER.error("Error polling %s: %s", self._name, e)
+            due = max(due + self.tick + phase, time.monotonic())
+            phase = 0.0
+            await asyncio.sleep(due - time.monotonic())
+
+    async def write(self, table, values):
+        """Write address -> value; returns address -> whether the request carrying it succeeded.
+
+        The next poll reports the unit's real state of the written points
+        and, with ``verify_writes``, checks it against what was written.
+        """
+        results = await send_writes(self._call, table, values, **self._id_kwargs)
+        for address, ok in results.items():
+            key = (table, address)
+            self._raw.pop(key, None)
+            # Only polled points are read back; anything else would wait for a confirmation forever
+            if self._verify_writes and ok and key in self._keys:
+                self._unverified[key] = values[address]
+        return results
@@ -0,0 +1,68 @@
+"""JSON lines protocol between the integration and the sidecar.
+
+Client (integration) to sidecar:
+
+- ``configure``: name, Modbus host, port, unit, pipeline window, max read
+  gap, poll interval per tier, forced refresh cycles, whether to verify
+  writes and the points to poll as
+  ``[table, address, data type, word order, bit, tier]`` lists. Replaces
+  any earlier configuration; the first poll reports every point.
+- ``poll``: read the points of ``keys`` (``[[table, address], ...]``), or
+  every point without it, now.
+- ``write``: ``id``, ``table`` and ``values`` as ``[[address, value], ...]``.
+
+Sidecar to client:
+
+- ``delta``: sent after every poll; ``available``, ``forced``, the
+  points whose raw value changed (every point read when forced), as
+  ``[[table, address, value], ...]``, and the engine's and connection's
+  ``stats`` for the diagnostic sensors.
+- ``written``: ``id`` and ``results`` as ``[[address, ok], ...]``.
+"""
+import asyncio
+import json
+
+OP_CONFIGURE = "configure"
+OP_POLL = "poll"
+OP_WRITE = "write"
+OP_DELTA = "delta"
+OP_WRITTEN = "written"
+
+# Longest accepted line; a configure message with a few hundred points fits
+LINE_LIMIT = 1024 * 1024
+
+
+def encode(message) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+async def read_message(reader):
+    """Return the next message, or None once the peer closed the link."""
+    line = await reader.readline()
+    if not line:
+        return None
+    return json.loads(line)
+
+
+def _parse(address):
+    """Split "host:port" or a unix socket path."""
+    if address.startswith("/"):
+        return None, address
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+async def open_link(address):
+    """Connect to the sidecar at "host:port" or a unix socket path."""
+    host, port = _parse(address)
+    if host is None:
+        return await asyncio.open_unix_connection(port, limit=LINE_LIMIT)
+    return await asyncio.open_connection(host, port, limit=LINE_LIMIT)
+
+
+async def start_server(handler, address):
+    """Serve ``handler(reader, writer)`` on "host:port" or a unix socket path."""
+    host, port = _parse(address)
+    if host is None:
+        return await asyncio.start_unix_server(handler, port, limit=LINE_LIMIT)
+    return await asyncio.start_server(handler, host, port, limit=LINE_LIMIT)
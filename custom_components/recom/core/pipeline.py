@@ -0,0 +1,220 @@
+"""Pipelined Modbus TCP client: several requests in flight on one socket.
+
+pymodbus' async client only sends the next request once the previous one has
+been answered. This client writes up to ``window`` requests back to back and
+matches the replies by the transaction ID in the MBAP header, so a poll cycle
+costs roughly one round-trip instead of one per request.
+"""
+import asyncio
+import struct
+
+from .const import PRIORITY_POLL
+from .scheduler import PrioritySemaphore
+
+import logging
+_LOGGER = logging.getLogger(__name__)
+
+# MBAP header: transaction id, protocol id, length, unit id
+_MBAP = struct.Struct(">HHHB")
+
+FC_READ_COILS = 0x01
+FC_READ_DISCRETE_INPUTS = 0x02
+FC_READ_HOLDING_REGISTERS = 0x03
+FC_READ_INPUT_REGISTERS = 0x04
+FC_WRITE_COIL = 0x05
+FC_WRITE_REGISTER = 0x06
+FC_WRITE_COILS = 0x0F
+FC_WRITE_REGISTERS = 0x10
+
+
+class PipelineError(Exception):
+    """The peer does not handle pipelined requests correctly."""
+
+
+class SkippedRequest(asyncio.TimeoutError):
+    """A request timed out although the unit answered requests sent after it."""
+
+
+class PipelinedResponse:
+    """Decoded response, shaped like the pymodbus responses the hub expects."""
+
+    def __init__(self, function_code, pdu, count=0):
+        self.function_code = function_code
+        # Raw PDU; block reads decode their registers straight from it
+        self.pdu = pdu
+        self._count = count
+        self._registers = None
+        self._bits = None
+        self.exception_code = None
+        if function_code & 0x80:
+            self.exception_code = pdu[1] if len(pdu) > 1 else None
+
+    @property
+    def registers(self) -> list:
+        """Register words, unpacked on first access."""
+        if self._registers is None:
+            self._registers = []
+            if self.function_code in (FC_READ_HOLDING_REGISTERS, FC_READ_INPUT_REGISTERS):
+                self._registers = list(struct.unpack_from(f">{self.pdu[1] // 2}H", self.pdu, 2))
+        return self._registers
+
+    @property
+    def bits(self) -> list:
+        """Coil/discrete input states, unpacked on first access."""
+        if self._bits is None:
+            self._bits = []
+            if self.function_code in (FC_READ_COILS, FC_READ_DISCRETE_INPUTS):
+                pdu = self.pdu
+                self._bits = [bool(pdu[2 + i // 8] >> (i % 8) & 1) for i in range(min(self._count, pdu[1] * 8))]
+        return self._bits
+
+    def isError(self) -> bool:
+        return self.exception_code is not None
+
+
+def _unit(kwargs) -> int:
+    """Accept both pymodbus spellings of the unit id."""
+    return kwargs.get("device_id", kwargs.get("slave", 1))
+
+
+class PipelinedModbusTcpClient:
+    """Minimal Modbus TCP client that keeps up to ``window`` requests in flight."""
+
+    def __init__(self, host, port, window, timeout=5):
+        """Initialize the client."""
+        self._host = host
+        self._port = port
+        self._timeout = timeout
+        # Writes get the next free slot ahead of queued poll reads
+        self._window = PrioritySemaphore(window)
+        self._connect_lock = asyncio.Lock()
+        self._reader = None
+        self._writer = None
+        self._reader_task = None
+        self._pending = {}
+        # Transaction ids that timed out on this socket; their late replies are dropped
+        self._expired = set()
+        # Replies matched per unit id, to tell a silent unit from a skipped request
+        self._answered = {}
+        self._transaction_id = 0
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def connect(self) -> bool:
+        async with self._connect_lock:
+            if self.connected:
+                return True
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self._host, self._port), self._timeout
+            )
+            self._reader_task = asyncio.get_running_loop().create_task(self._read_loop())
+            return True
+
+    def close(self) -> None:
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            self._reader_task = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self._expired.clear()
+        self._fail_pending(ConnectionError("Connection closed"))
+
+    def _fail_pending(self, exc):
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(exc)
+
+    async def _read_loop(self):
+        try:
+            while True:
+                header = await self._reader.readexactly(_MBAP.size)
+                transaction_id, protocol_id, length, unit_id = _MBAP.unpack(header)
+                pdu = await self._reader.readexactly(length - 1)
+                if protocol_id != 0:
+                    raise PipelineError(f"Unexpected protocol id {protocol_id}")
+                future = self._pending.pop(transaction_id, None)
+                if future is None:
+                    if transaction_id in self._expired:
+                        # Late reply to a request that already timed out
+                        self._expired.discard(transaction_id)
+                        _LOGGER.debug("Dropping late reply to transaction %s", transaction_id)
+                        continue
+                    raise PipelineError(f"Unexpected transaction id {transaction_id}")
+                self._answered[unit_id] = self._answered.get(unit_id, 0) + 1
+                if not future.done():
+                    future.set_result(pdu)
+        except asyncio.CancelledError:
+            raise
+        except PipelineError as e:
+            self._fail_pending(e)
+        except Exception as e:
+            self._fail_pending(ConnectionError(f"Connection lost: {e}"))
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    async def _execute(self, kwargs, function_code, payload, count=0):
+        unit = _unit(kwargs)
+        if not self.connected:
+            try:
+                await self.connect()
+            except asyncio.TimeoutError as e:
+                # A unit that is down is not a pipelining problem
+                raise ConnectionError(f"Connect to {self._host}:{self._port} timed out") from e
+        async with self._window.slot(kwargs.get("priority", PRIORITY_POLL)):
+            self._transaction_id = (self._transaction_id + 1) & 0xFFFF
+            transaction_id = self._transaction_id
+            self._expired.discard(transaction_id)
+            future = asyncio.get_running_loop().create_future()
+            self._pending[transaction_id] = future
+            answered = self._answered.get(unit, 0)
+            pdu = bytes((function_code,)) + payload
+            self._writer.write(_MBAP.pack(transaction_id, 0, len(pdu) + 1, unit) + pdu)
+            try:
+                response = await asyncio.wait_for(future, self._timeout)
+            except asyncio.TimeoutError:
+                if self._pending.pop(transaction_id, None) is not None:
+                    self._expired.add(transaction_id)
+                if self._answered.get(unit, 0) > answered:
+                    # The unit is up and answered later requests, just not this one
+                    raise SkippedRequest(f"Transaction {transaction_id} skipped by unit {unit}") from None
+                raise asyncio.TimeoutError(f"Transaction {transaction_id}: no reply from unit {unit}") from None
+        if response[0] & 0x7F != function_code:
+            raise PipelineError(
+                f"Transaction {transaction_id}: sent function {function_code}, got {response[0]}"
+            )
+        return PipelinedResponse(response[0], response, count)
+
+    async def read_coils(self, address, count=1, **kwargs):
+        return await self._execute(kwargs, FC_READ_COILS, struct.pack(">HH", address, count), count)
+
+    async def read_discrete_inputs(self, address, count=1, **kwargs):
+        return await self._execute(kwargs, FC_READ_DISCRETE_INPUTS, struct.pack(">HH", address, count), count)
+
+    async def read_holding_registers(self, address, count=1, **kwargs):
+        return await self._execute(kwargs, FC_READ_HOLDING_REGISTERS, struct.pack(">HH", address, count))
+
+    async def read_input_registers(self, address, count=1, **kwargs):
+        return await self._execute(kwargs, FC_READ_INPUT_REGISTERS, struct.pack(">HH", address, count))
+
+    async def write_coil(self, address, value, **kwargs):
+        return await self._execute(kwargs, FC_WRITE_COIL, struct.pack(">HH", address, 0xFF00 if value else 0))
+
+    async def write_register(self, address, value, **kwargs):
+        return await self._execute(kwargs, FC_WRITE_REGISTER, struct.pack(">HH", address, value & 0xFFFF))
+
+    async def write_coils(self, address, values, **kwargs):
+        packed = bytearray((len(values) + 7) // 8)
+        for i, value in enumerate(values):
+            if value:
+                packed[i // 8] |= 1 << (i % 8)
+        payload = struct.pack(">HHB", address, len(values), len(packed)) + bytes(packed)
+        return await self._execute(kwargs, FC_WRITE_COILS, payload)
+
+    async def write_registers(self, address, values, **kwargs):
+        payload = struct.pack(f">HHB{len(values)}H", address, len(values), 2 * len(values), *(v & 0xFFFF for v in values))
+        return await self._execute(kwargs, FC_WRITE_REGISTERS, payload)
@@ -0,0 +1,97 @@
+"""Read planning: coalesce single register addresses into block reads."""
+from bisect import bisect_right
+from typing import Iterable, Mapping, NamedTuple, Optional
+
+# Modbus limits a single FC03/FC04 response to 125 registers.
+MAX_REGISTERS_PER_READ = 125
+# ... and a single FC01/FC02 response to 2000 coils/discrete inputs.
+MAX_BITS_PER_READ = 2000
+# A single FC16 request carries at most 123 registers, FC15 at most 1968 coils.
+MAX_REGISTERS_PER_WRITE = 123
+MAX_COILS_PER_WRITE = 1968
+
+
+class ReadBlock(NamedTuple):
+    """One contiguous block read."""
+
+    start: int
+    count: int
+
+    @property
+    def end(self) -> int:
+        """Last address covered by the block."""
+        return self.start + self.count - 1
+
+
+def plan_reads(
+    addresses: Iterable[int],
+    max_gap: int = 0,
+    max_count: int = MAX_REGISTERS_PER_READ,
+    widths: Optional[Mapping[int, int]] = None,
+    unmapped: Iterable[int] = (),
+) -> list[ReadBlock]:
+    """Group addresses into the fewest contiguous block reads.
+
+    ``widths`` maps the address of a multi-register value to its number of
+    registers (1 when missing); such a value always lands in one block.
+    Two values end up in the same block when no more than ``max_gap``
+    unused registers lie between them and the block stays within
+    ``max_count`` registers.
+
+    No block bridges an address in ``unmapped`` (registers the unit
+    rejected), and requested addresses in it are read on their own.
+    """
+    widths = widths or {}
+    unmapped = set(unmapped)
+    barriers = sorted(unmapped)
+    blocks: list[ReadBlock] = []
+    start = end = None
+    alone = False
+    for address in sorted(set(addresses)):
+        last = address + widths.get(address, 1) - 1
+        if start is None:
+            start, end, alone = address, last, address in unmapped
+            continue
+        barrier = bisect_right(barriers, end)
+        if (
+            address - end - 1 <= max_gap
+            and max(end, last) - start < max_count
+            and not alone
+            and address not in unmapped
+            and (barrier == len(barriers) or barriers[barrier] >= address)
+        ):
+            end = max(end, last)
+            continue
+        blocks.append(ReadBlock(start, end - start + 1))
+        start, end, alone = address, last, address in unmapped
+    if start is not None:
+        blocks.append(ReadBlock(start, end - start + 1))
+    return blocks
+
+
+class WriteBlock(NamedTuple):
+    """One contiguous multi-register/multi-coil write."""
+
+    start: int
+    values: tuple
+
+
+def plan_writes(values: Mapping[int, int], max_count: int = MAX_REGISTERS_PER_WRITE) -> list[WriteBlock]:
+    """Split address -> value writes into runs of consecutive addresses.
+
+    Only truly contiguous addresses are merged: bridging a gap would
+    overwrite the registers in between.
+    """
+    blocks: list[WriteBlock] = []
+    run: list[int] = []
+    start = None
+    for address in sorted(values):
+        if start is not None and address == start + len(run) and len(run) < max_count:
+            run.append(values[address])
+            continue
+        if start is not None:
+            blocks.append(WriteBlock(start, tuple(run)))
+        start, run = address, [values[address]]
+    if start is not None:
+        blocks.append(WriteBlock(start, tuple(run)))
+    return blocks
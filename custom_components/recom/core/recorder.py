@@ -0,0 +1,186 @@
+"""Record Modbus traffic of a hub and replay it later.
+
+``TrafficRecorder`` appends one JSON line per request: time offset, function
+code, unit, address, count (or written values), the raw response PDU as hex
+(None when there was none) and the latency. ``ReplayConnection``
+stands in for ``RecomModbusConnection`` and answers a hub's requests from
+such a log, optionally with the recorded latencies.
+"""
+import asyncio
+import json
+import os
+import struct
+import time
+from collections import defaultdict, deque
+from typing import Optional
+
+from .connection import DEVICE_KW, UnitNotResponding
+from .const import PRIORITY_POLL
+from .pipeline import (
+    FC_READ_COILS,
+    FC_READ_DISCRETE_INPUTS,
+    FC_READ_HOLDING_REGISTERS,
+    FC_READ_INPUT_REGISTERS,
+    FC_WRITE_COIL,
+    FC_WRITE_REGISTER,
+    PipelinedResponse,
+)
+from .stats import FUNCTION_CODES, ConnectionStats
+
+import logging
+_LOGGER = logging.getLogger(__name__)
+
+_REGISTER_READS = (FC_READ_HOLDING_REGISTERS, FC_READ_INPUT_REGISTERS)
+_BIT_READS = (FC_READ_COILS, FC_READ_DISCRETE_INPUTS)
+
+
+def _request(args, kwargs):
+    """Return (address, count, written values) of a hub request."""
+    address = kwargs.get("address", args[0] if args else 0)
+    value = kwargs.get("value", kwargs.get("values", args[1] if len(args) > 1 else None))
+    if value is None:
+        return address, kwargs.get("count", 1), None
+    values = [int(x) for x in value] if isinstance(value, (list, tuple)) else [int(value)]
+    return address, len(values), values
+
+
+def response_pdu(function_code, address, count, values, res) -> Optional[bytes]:
+    """Return the response PDU of a request, rebuilt from pymodbus responses where needed."""
+    if res is None:
+        return None
+    pdu = getattr(res, "pdu", None)
+    if pdu is not None:
+        return bytes(pdu)
+    if res.isError():
+        return bytes((function_code | 0x80, getattr(res, "exception_code", None) or 0))
+    if function_code in _REGISTER_READS:
+        registers = res.registers
+        return struct.pack(f">BB{len(registers)}H", function_code, 2 * len(registers), *registers)
+    if function_code in _BIT_READS:
+        packed = bytearray((count + 7) // 8)
+        for index, bit in enumerate(res.bits[:count]):
+            if bit:
+                packed[index >> 3] |= 1 << (index & 7)
+        return bytes((function_code, len(packed))) + packed
+    # Write responses echo the request
+    if function_code == FC_WRITE_COIL:
+        return struct.pack(">BHH", function_code, address, 0xFF00 if values[0] else 0)
+    if function_code == FC_WRITE_REGISTER:
+        return struct.pack(">BHH", function_code, address, values[0])
+    return struct.pack(">BHH", function_code, address, count)
+
+
+class TrafficRecorder:
+    """Append-only JSON lines log of requests, rotated by size.
+
+    ``record`` only buffers; ``flush`` does the file I/O and belongs in the
+    executor.
+    """
+
+    def __init__(self, path, max_bytes, backup_count):
+        self.path = path
+        self._max_bytes = max_bytes
+        self._backup_count = backup_count
+        self._start = time.monotonic()
+        self._lines = []
+
+    def record(self, method, args, kwargs, res, ms, lost=False):
+        """Buffer one request; ``lost`` marks a unit that didn't answer at all."""
+        function_code = FUNCTION_CODES.get(method, 0)
+        address, count, values = _request(args, kwargs)
+        pdu = response_pdu(function_code, address, count, values, res)
+        line = {
+            "t": round(time.monotonic() - self._start, 4),
+            "fc": function_code,
+            "unit": kwargs.get(DEVICE_KW, 1),
+            "address": address,
+            "count": count,
+            "pdu": pdu.hex() if pdu is not None else None,
+            "ms": round(ms, 3),
+        }
+        if values is not None:
+            line["values"] = values
+        if lost:
+            line["error"] = "no response"
+        elif res is None:
+            line["error"] = "failed"
+        elif res.isError():
+            line["error"] = f"exception {pdu[1]}"
+        self._lines.append(json.dumps(line, separators=(",", ":")))
+
+    def flush(self):
+        lines, self._lines = self._lines, []
+        if not lines:
+            return
+        try:
+            with open(self.path, "a", encoding="utf-8") as fh:
+                fh.write("\n".join(lines) + "\n")
+                size = fh.tell()
+            if size >= self._max_bytes:
+                self._rotate()
+        except OSError as e:
+            _LOGGER.warning("Can't write Modbus traffic log %s: %s", self.path, e)
+
+    def _rotate(self):
+        """Shift path.1 .. path.N up by one and move the current log to path.1."""
+        for index in range(self._backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self._backup_count:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+
+def load_records(path) -> list[dict]:
+    """Read a traffic log written by TrafficRecorder."""
+    with open(path, encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+class ReplayConnection:
+    """Answer a hub's requests from a recorded session instead of a unit.
+
+    Requests are matched to recorded ones by function code, unit and address
+    and answered in recorded order, starting over once a request's records
+    are used up. ``speed`` scales the recorded latencies: 1 replays at the
+    original speed, 10 ten times faster, 0 without waiting.
+    """
+
+    pipeline = None
+
+    def __init__(self, records, speed=1.0, key="replay"):
+        self.key = key
+        self.users = 0
+        self.speed = speed
+        self.stats = ConnectionStats()
+        self.unmatched = 0
+        # (function code, unit, address) -> recorded requests, in order
+        self._records = defaultdict(deque)
+        for record in records:
+            self._records[(record["fc"], record["unit"], record["address"])].append(record)
+
+    async def connect(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def call_with_retry(self, method, *args, priority=PRIORITY_POLL, **kwargs):
+        address, count, _values = _request(args, kwargs)
+        queue = self._records.get((FUNCTION_CODES.get(method, 0), kwargs.get(DEVICE_KW, 1), address))
+        if not queue:
+            self.unmatched += 1
+            _LOGGER.debug("No recorded %s at %s", method, address)
+            return None
+        record = queue[0]
+        queue.rotate(-1)
+        if self.speed:
+            await asyncio.sleep(record["ms"] / 1000 / self.speed)
+        if record.get("error") == "no response":
+            raise UnitNotResponding(f"No reply recorded for {method} at {address}")
+        if record["pdu"] is None:
+            return None
+        pdu = bytes.fromhex(record["pdu"])
+        return PipelinedResponse(pdu[0], pdu, record["count"])
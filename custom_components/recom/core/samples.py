@@ -0,0 +1,60 @@
+"""Fixed size in-memory sample history."""
+from array import array
+from typing import Optional
+
+
+class SampleRing:
+    """The last ``capacity`` (timestamp, value) samples of one register.
+
+    Timestamps and values live in two preallocated ``array('d')``, 16 bytes
+    per sample, so an hour at a 2 s rate costs about 29 kB and appending
+    never allocates.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._times = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        # Slot the next sample goes to, and how many slots hold samples
+        self._next = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, timestamp, value):
+        self._times[self._next] = timestamp
+        self._values[self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def _slots(self):
+        """Slot indexes from the oldest sample to the newest."""
+        first = (self._next - self._count) % self.capacity
+        return ((first + offset) % self.capacity for offset in range(self._count))
+
+    def samples(self, since=0.0) -> list:
+        """[timestamp, value] pairs taken at or after ``since``, oldest first."""
+        return [
+            [self._times[slot], self._values[slot]] for slot in self._slots() if self._times[slot] >= since
+        ]
+
+    def aggregate(self, start, end) -> Optional[tuple]:
+        """(min, mean, max, count) of the samples in [start, end), or None without any."""
+        low = high = None
+        total = 0.0
+        count = 0
+        for slot in self._slots():
+            if not start <= self._times[slot] < end:
+                continue
+            value = self._values[slot]
+            if count == 0:
+                low = high = value
+            else:
+                low = min(low, value)
+                high = max(high, value)
+            total += value
+            count += 1
+        if not count:
+            return None
+        return low, total / count, high, count
@@ -0,0 +1,53 @@
+"""Priority access to a connection: user writes go ahead of background polling."""
+import asyncio
+import contextlib
+import heapq
+import itertools
+
+
+class PrioritySemaphore:
+    """Semaphore whose waiters are served by priority (lower first), then FIFO.
+
+    A poll cycle queues all of its reads at once; a write queued later still
+    gets the next free slot instead of waiting for the whole cycle.
+    """
+
+    def __init__(self, value=1):
+        """Initialize the semaphore with ``value`` slots."""
+        self._value = value
+        self._waiters = []
+        self._order = itertools.count()
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for *_, future in self._waiters if not future.done())
+
+    async def acquire(self, priority):
+        if self._value > 0 and not self.waiting:
+            self._value -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._order), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Handed a slot just as we were cancelled; pass it on
+                self.release()
+            raise
+
+    def release(self):
+        while self._waiters:
+            *_, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._value += 1
+
+    @contextlib.asynccontextmanager
+    async def slot(self, priority):
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
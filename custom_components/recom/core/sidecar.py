@@ -0,0 +1,154 @@
+"""Run the Modbus polling outside Home Assistant.
+
+From the integration's directory (``custom_components/recom``):
+
+    python -m core.sidecar --listen 127.0.0.1:8502
+
+or ``--listen /run/recom.sock`` for a unix socket. Every integration entry
+with the Sidecar option set connects, sends its points and from then on only
+receives the values that changed (see ``ipc``). Each unit runs the same
+``RecomEngine`` as in-process, circuit breaker and write verification
+included. Units behind one gateway share a Modbus connection, their cycles
+are spread over the interval and at most ``--max-concurrent`` poll at once.
+"""
+import argparse
+import asyncio
+import logging
+
+from . import ipc
+from .connection import RecomModbusConnection
+from .const import FLEET_MAX_CONCURRENT_POLLS
+from .engine import Point, RecomEngine
+from .stats import reported_stats
+
+_LOGGER = logging.getLogger(__name__)
+
+# Share of the interval between the phases of engines started one after
+# another (golden ratio conjugate); they never bunch up, however many come and go
+PHASE_STEP = 0.6180339887
+
+
+class Sidecar:
+    """Serves engines to integration entries over the IPC protocol."""
+
+    def __init__(self, max_concurrent=FLEET_MAX_CONCURRENT_POLLS):
+        # host:port -> RecomModbusConnection
+        self._connections = {}
+        # Poll cycles of all engines allowed to run at the same time
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._started = 0
+
+    def _acquire(self, host, port, pipeline_window):
+        key = f"{host}:{port}"
+        connection = self._connections.get(key)
+        if connection is None:
+            connection = self._connections[key] = RecomModbusConnection(host, port, pipeline_window)
+        connection.users += 1
+        return connection
+
+    async def _release(self, connection):
+        connection.users -= 1
+        if connection.users > 0:
+            return
+        self._connections.pop(connection.key, None)
+        await connection.close()
+
+    async def handle(self, reader, writer):
+        """Serve one integration entry until it disconnects."""
+        connection = None
+        engine = None
+        poll_task = None
+        tasks = set()
+
+        def send(message):
+            if not writer.is_closing():
+                writer.write(ipc.encode(message))
+
+        def on_delta(delta, available, forced):
+            send({
+                "op": ipc.OP_DELTA,
+                "available": available,
+                "forced": forced,
+                "values": [[table, address, value] for (table, address), value in delta.items()],
+                "stats": reported_stats(engine.stats, connection.stats),
+            })
+
+        async def write(message):
+            values = {address: value for address, value in message["values"]}
+            results = await engine.write(message["table"], values)
+            send({"op": ipc.OP_WRITTEN, "id": message["id"], "results": list(results.items())})
+
+        def spawn(coro):
+            task = asyncio.get_running_loop().create_task(coro)
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        try:
+            while (message := await ipc.read_message(reader)) is not None:
+                op = message.get("op")
+                if op == ipc.OP_CONFIGURE:
+                    if poll_task is not None:
+                        poll_task.cancel()
+                    if connection is not None:
+                        await self._release(connection)
+                    connection = self._acquire(message["host"], message["port"], message["pipeline_window"])
+                    engine = RecomEngine(
+                        connection,
+                        [Point(*point) for point in message["points"]],
+                        message["intervals"],
+                        message["max_read_gap"],
+                        message["unit"],
+                        on_delta,
+                        name=message.get("name"),
+                        force_refresh_cycles=message.get("force_refresh_cycles", 0),
+                        verify_writes=message.get("verify_writes", False),
+                    )
+                    phase = self._started * PHASE_STEP % 1 * engine.tick
+                    self._started += 1
+                    poll_task = asyncio.get_running_loop().create_task(engine.run(phase, self._slots))
+                    _LOGGER.info(
+                        "Polling %s points of unit %s at %s", len(message["points"]), message["unit"], connection.key
+                    )
+                elif engine is None:
+                    _LOGGER.warning("Ignoring %s before configure", op)
+                elif op == ipc.OP_POLL:
+                    keys = message.get("keys")
+                    spawn(engine.poll(keys=None if keys is None else frozenset(map(tuple, keys))))
+                elif op == ipc.OP_WRITE:
+                    spawn(write(message))
+        except (ConnectionError, ValueError) as e:
+            _LOGGER.warning("Dropping client: %s", e)
+        finally:
+            for task in (poll_task, *tasks):
+                if task is not None:
+                    task.cancel()
+            if connection is not None:
+                await self._release(connection)
+            writer.close()
+
+
+async def serve(address, max_concurrent=FLEET_MAX_CONCURRENT_POLLS):
+    sidecar = Sidecar(max_concurrent)
+    server = await ipc.start_server(sidecar.handle, address)
+    _LOGGER.info("Listening on %s", address)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recom Modbus polling sidecar")
+    parser.add_argument("--listen", default="127.0.0.1:8502", help="host:port or unix socket path")
+    parser.add_argument(
+        "--max-concurrent", type=int, default=FLEET_MAX_CONCURRENT_POLLS, help="units polling at the same time"
+    )
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=args.log_level, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    try:
+        asyncio.run(serve(args.listen, args.max_concurrent))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Hot-path counters for the hub and its connection."""
+from collections import deque
+import statistics
+
+from .pipeline import (
+    FC_READ_COILS,
+    FC_READ_DISCRETE_INPUTS,
+    FC_READ_HOLDING_REGISTERS,
+    FC_READ_INPUT_REGISTERS,
+    FC_WRITE_COIL,
+    FC_WRITE_REGISTER,
+    FC_WRITE_COILS,
+    FC_WRITE_REGISTERS,
+)
+
+# Client method name -> Modbus function code
+FUNCTION_CODES = {
+    "read_coils": FC_READ_COILS,
+    "read_discrete_inputs": FC_READ_DISCRETE_INPUTS,
+    "read_holding_registers": FC_READ_HOLDING_REGISTERS,
+    "read_input_registers": FC_READ_INPUT_REGISTERS,
+    "write_coil": FC_WRITE_COIL,
+    "write_register": FC_WRITE_REGISTER,
+    "write_coils": FC_WRITE_COILS,
+    "write_registers": FC_WRITE_REGISTERS,
+}
+
+# Upper bucket edges of the request latency histograms, in milliseconds
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+# Poll cycles kept for the cycle duration statistics
+CYCLE_HISTORY = 100
+
+
+class LatencyHistogram:
+    """Request latencies bucketed by LATENCY_BUCKETS_MS, plus an overflow bucket."""
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms):
+        index = len(LATENCY_BUCKETS_MS)
+        for i, edge in enumerate(LATENCY_BUCKETS_MS):
+            if ms <= edge:
+                index = i
+                break
+        self.buckets[index] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    @property
+    def mean_ms(self):
+        return self.total_ms / self.count if self.count else None
+
+    def as_dict(self):
+        edges = [f"<={edge}" for edge in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}"]
+        return {
+            "count": self.count,
+            "mean_ms": self.mean_ms,
+            "max_ms": self.max_ms,
+            "buckets_ms": dict(zip(edges, self.buckets)),
+        }
+
+
+class HubStats:
+    """Poll cycle and request statistics of one hub."""
+
+    def __init__(self):
+        self.cycles = 0
+        self.skipped_cycles = 0
+        self.cycle_errors = 0
+        self.offline_trips = 0
+        # Off-cycle reads of entities in a burst
+        self.burst_polls = 0
+        # Off-cycle reads of the sampled sensors into their ring buffers
+        self.sample_polls = 0
+        # async_setup_entry duration and time from hub creation to the first completed cycle
+        self.setup_ms = None
+        self.first_poll_ms = None
+        self.last_cycle_ms = None
+        self.cycle_ms = deque(maxlen=CYCLE_HISTORY)
+        self.requests = 0
+        self.failed_requests = 0
+        # function code -> LatencyHistogram
+        self.latency = {}
+
+    def record_cycle(self, ms):
+        self.cycles += 1
+        self.last_cycle_ms = ms
+        self.cycle_ms.append(ms)
+
+    def record_request(self, method, ms, failed):
+        self.requests += 1
+        if failed:
+            self.failed_requests += 1
+        function_code = FUNCTION_CODES.get(method, 0)
+        histogram = self.latency.get(function_code)
+        if histogram is None:
+            histogram = self.latency[function_code] = LatencyHistogram()
+        histogram.add(ms)
+
+    @property
+    def mean_latency_ms(self):
+        count = sum(h.count for h in self.latency.values())
+        if not count:
+            return None
+        return sum(h.total_ms for h in self.latency.values()) / count
+
+    def as_dict(self):
+        cycle_ms = list(self.cycle_ms)
+        return {
+            "setup_ms": self.setup_ms,
+            "first_poll_ms": self.first_poll_ms,
+            "cycles": self.cycles,
+            "skipped_cycles": self.skipped_cycles,
+            "cycle_errors": self.cycle_errors,
+            "offline_trips": self.offline_trips,
+            "burst_polls": self.burst_polls,
+            "sample_polls": self.sample_polls,
+            "last_cycle_ms": self.last_cycle_ms,
+            "cycle_p50_ms": statistics.median(cycle_ms) if cycle_ms else None,
+            "cycle_max_ms": max(cycle_ms) if cycle_ms else None,
+            "requests": self.requests,
+            "failed_requests": self.failed_requests,
+            "latency_by_function_code": {
+                f"0x{code:02x}": histogram.as_dict()
+                for code, histogram in sorted(self.latency.items())
+            },
+        }
+
+
+class ConnectionStats:
+    """Retry, reconnect and timeout counters of one (possibly shared) connection."""
+
+    def __init__(self):
+        self.retries = 0
+        self.reconnects = 0
+        self.timeouts = 0
+
+    def as_dict(self):
+        return {
+            "retries": self.retries,
+            "reconnects": self.reconnects,
+            "timeouts": self.timeouts,
+        }
+
+
+def reported_stats(hub_stats: HubStats, connection_stats: ConnectionStats) -> dict:
+    """Counters a sidecar sends with every delta, for the diagnostic sensors."""
+    return {
+        "last_cycle_ms": hub_stats.last_cycle_ms,
+        "mean_latency_ms": hub_stats.mean_latency_ms,
+        "cycles": hub_stats.cycles,
+        "requests": hub_stats.requests,
+        "failed_requests": hub_stats.failed_requests,
+        **connection_stats.as_dict(),
+    }
@@ -0,0 +1,27 @@
+"""Diagnostics download for recom."""
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_HOST, CONF_NAME
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, CONF_SIDECAR
+
+TO_REDACT = {CONF_HOST, CONF_SIDECAR}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return poll and connection statistics for a config entry."""
+    hub = hass.data[DOMAIN][entry.data[CONF_NAME]]["hub"]
+    diagnostics = hub.diagnostics()
+    # The connection key is host:port; the sidecar address may be one too
+    diagnostics["connection"].pop("key", None)
+    diagnostics["connection"].pop("sidecar", None)
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": async_redact_data(dict(entry.options), TO_REDACT),
+        },
+        **diagnostics,
+    }
@@ -10,7 +10,7 @@ from homeassistant.components.fan import (
     FanEntity,
     FanEntityFeature,
 )
-from typing import Optional
+from typing import Optional, Dict, Any
 
 from .const import (
     DOMAIN, 
@@ -20,6 +20,7 @@ from .const import (
     FAN_MANUAL_SPEED_ADDRESS,
     FAN_SPEED_RANGE,
     FAN_SPEED_MODES, 
+    FAN_POLL_TIER,
     ENTITY_FAN
 )
 
@@ -74,17 +75,21 @@ class RecomFanEntity(FanEntity):
         """Add callbacks"""
         self._hub.async_add_entity(self, self.update_callback)
 
+    async def async_will_remove_from_hass(self):
+        """Stop polling this entity's registers."""
+        self._hub.async_remove_entity(self)
+
     async def async_turn_on(self, percentage: str = None, preset_mode: str = None, **kwargs):
-        await self._hub._hass.async_add_executor_job(self._hub.fan_turn_on, self)
+        await self._hub.fan_turn_on(self, percentage, preset_mode)
 
     async def async_turn_off(self):
-        await self._hub._hass.async_add_executor_job(self._hub.fan_turn_off, self)
+        await self._hub.fan_turn_off(self)
 
     async def async_set_percentage(self, percentage):
-        await self._hub._hass.async_add_executor_job(self._hub.fan_set_percentage, self, percentage)
+        await self._hub.fan_set_percentage(self, percentage)
 
     async def async_set_preset_mode(self, preset_mode):
-        await self._hub._hass.async_add_executor_job(self._hub.fan_speed_change_mode, self, preset_mode)
+        await self._hub.fan_speed_change_mode(self, preset_mode)
 
     @callback
     def update_callback(self):
@@ -109,6 +114,10 @@ class RecomFanEntity(FanEntity):
     def speed_mode_address(self):
         return self._speed_mode_address
 
+    @property
+    def poll_tier(self):
+        return FAN_POLL_TIER
+
     @property
     def entity_type(self):
         return self._entity_type
@@ -117,6 +126,18 @@ class RecomFanEntity(FanEntity):
     def is_on(self):
         return self._attr_is_on
 
+    @property
+    def available(self) -> bool:
+        return self._hub.available
+
+    @property
+    def extra_state_attributes(self) -> Optional[Dict[str, Any]]:
+        """Flag values restored from the last run until a poll confirms them."""
+        stale_since = self._hub.stale_since(self._name)
+        if stale_since is None:
+            return None
+        return {"restored": True, "last_polled": stale_since}
+
     @property
     def name(self):
         return self._name
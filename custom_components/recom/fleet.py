@@ -0,0 +1,156 @@
+"""Poll timers of every hub in the domain, staggered and capped."""
+import asyncio
+from collections import deque
+from functools import partial
+import math
+import statistics
+import time
+
+from homeassistant.helpers.event import async_call_later
+
+from .const import DOMAIN, DATA_FLEET, FLEET_MAX_CONCURRENT_POLLS
+
+import logging
+_LOGGER = logging.getLogger(__name__)
+
+# Cycle starts kept for the fleet lag statistics
+LAG_HISTORY = 200
+
+
+class ScheduledPoll:
+    """One hub's place in the fleet schedule."""
+
+    def __init__(self, scheduler, name, interval, action, on_skip=None):
+        self._scheduler = scheduler
+        self.name = name
+        self.interval = interval
+        self.action = action
+        # Called when a cycle is skipped because the previous one still runs
+        self.on_skip = on_skip
+        # Offset into the interval, and the monotonic time of the next start
+        self.phase = 0.0
+        self.due = None
+        # Time from the due start to the actual start of the last cycle
+        self.cycle_lag_ms = None
+        self.busy = False
+        self.cancel_timer = None
+
+    async def async_run_now(self):
+        """Run a cycle outside the schedule, still within the concurrency cap."""
+        await self._scheduler.run(self, time.monotonic())
+
+    def cancel(self):
+        self._scheduler.unregister(self)
+
+
+class FleetScheduler:
+    """Spread hub poll cycles over their interval and cap how many run at once.
+
+    Hubs sharing an interval get evenly spaced phase offsets, so 50 units on a
+    30 s interval start a cycle every 0.6 s instead of all on the same tick.
+    A cycle that finds ``max_concurrent`` others running waits for a slot;
+    the wait shows up as cycle lag.
+    """
+
+    def __init__(self, hass, max_concurrent=FLEET_MAX_CONCURRENT_POLLS):
+        self._hass = hass
+        self.max_concurrent = max_concurrent
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._polls = []
+        # Phases are counted from here
+        self._epoch = time.monotonic()
+        self.running = 0
+        self.waiting = 0
+        self.skipped_cycles = 0
+        self.lag_ms = deque(maxlen=LAG_HISTORY)
+
+    def register(self, name, interval, action, on_skip=None) -> ScheduledPoll:
+        """Start calling ``action`` every ``interval`` seconds; re-spreads all hubs."""
+        poll = ScheduledPoll(self, name, interval, action, on_skip)
+        self._polls.append(poll)
+        self._rephase()
+        return poll
+
+    def unregister(self, poll):
+        if poll not in self._polls:
+            return
+        self._polls.remove(poll)
+        if poll.cancel_timer is not None:
+            poll.cancel_timer()
+            poll.cancel_timer = None
+        self._rephase()
+
+    def _rephase(self):
+        """Space the hubs of each interval evenly over it and re-arm their timers."""
+        by_interval = {}
+        for poll in self._polls:
+            by_interval.setdefault(poll.interval, []).append(poll)
+        now = time.monotonic()
+        for interval, polls in by_interval.items():
+            for index, poll in enumerate(polls):
+                poll.phase = interval * index / len(polls)
+                self._schedule(poll, now)
+
+    def _schedule(self, poll, after):
+        """Arm the timer for the first phase-aligned start later than ``after``."""
+        if poll.cancel_timer is not None:
+            poll.cancel_timer()
+        periods = math.floor((after - self._epoch - poll.phase) / poll.interval) + 1
+        poll.due = self._epoch + poll.phase + periods * poll.interval
+        poll.cancel_timer = async_call_later(
+            self._hass, poll.due - time.monotonic(), partial(self._fire, poll)
+        )
+
+    async def _fire(self, poll, _now=None):
+        poll.cancel_timer = None
+        due = poll.due
+        # Timers may fire a little early; never schedule the same start twice
+        self._schedule(poll, max(time.monotonic(), due))
+        if poll.busy:
+            # The previous cycle is still waiting for a slot or for the unit
+            self.skipped_cycles += 1
+            if poll.on_skip is not None:
+                poll.on_skip()
+            return
+        await self.run(poll, due)
+
+    async def run(self, poll, due):
+        """Run one cycle of ``poll`` once a slot is free."""
+        poll.busy = True
+        try:
+            self.waiting += 1
+            try:
+                await self._slots.acquire()
+            finally:
+                self.waiting -= 1
+            self.running += 1
+            try:
+                poll.cycle_lag_ms = max(0.0, time.monotonic() - due) * 1000
+                self.lag_ms.append(poll.cycle_lag_ms)
+                await poll.action()
+            finally:
+                self.running -= 1
+                self._slots.release()
+        finally:
+            poll.busy = False
+
+    def as_dict(self):
+        lag_ms = list(self.lag_ms)
+        return {
+            "hubs": len(self._polls),
+            "max_concurrent": self.max_concurrent,
+            "running": self.running,
+            "waiting": self.waiting,
+            "skipped_cycles": self.skipped_cycles,
+            "lag_p50_ms": statistics.median(lag_ms) if lag_ms else None,
+            "lag_max_ms": max(lag_ms) if lag_ms else None,
+            "phases_s": {poll.name: round(poll.phase, 3) for poll in self._polls},
+        }
+
+
+def get_fleet_scheduler(hass) -> FleetScheduler:
+    """Return the domain's scheduler, creating it on first use."""
+    fleet = hass.data[DOMAIN].get(DATA_FLEET)
+    if fleet is None:
+        fleet = hass.data[DOMAIN][DATA_FLEET] = FleetScheduler(hass)
+    return fleet
@@ -0,0 +1,167 @@
+"""Hub adapter for a sidecar doing the Modbus polling outside Home Assistant."""
+import asyncio
+import itertools
+
+from homeassistant.helpers.event import async_call_later
+
+from . import RecomModbusHub
+from .const import SIDECAR_RECONNECT_SECONDS
+from .core import ipc
+from .core.stats import ConnectionStats
+
+import logging
+_LOGGER = logging.getLogger(__name__)
+
+# Entities are added one by one during setup; configure the sidecar once they settle
+CONFIGURE_DELAY_SECONDS = 0.5
+
+
+class RemoteRecomHub(RecomModbusHub):
+    """RecomModbusHub whose polling and decoding run in the sidecar.
+
+    Entities, publishing, deadbands, queued writes and the snapshot store
+    stay in the hub. The sidecar runs the same RecomEngine the hub runs in
+    process and sends each poll's delta; writes go the other way.
+    """
+
+    def __init__(self, hass, name, sidecar, host, port, pipeline_window, unit_id, scan_interval, *args, **kwargs):
+        """Initialize the hub; ``sidecar`` is "host:port" or a unix socket path."""
+        super().__init__(hass, name, None, unit_id, scan_interval, *args, **kwargs)
+        self._sidecar = sidecar
+        self._modbus = {"host": host, "port": port, "unit": unit_id, "pipeline_window": pipeline_window}
+        self._writer = None
+        self._closed = False
+        self._unsub_configure = None
+        self._write_ids = itertools.count()
+        # write id -> future of address -> ok
+        self._pending = {}
+        self._connection_stats = ConnectionStats()
+        # Engine and connection counters the sidecar sends with every delta
+        self._sidecar_stats = {}
+        self.deltas = 0
+
+    @property
+    def connection_stats(self):
+        """The Modbus connection lives in the sidecar; nothing to count here."""
+        return self._connection_stats
+
+    def diagnostic_value(self, key):
+        """Return one DIAGNOSTIC_TYPES statistic, as last reported by the sidecar where it has it."""
+        if key in self._sidecar_stats:
+            return self._sidecar_stats[key]
+        return super().diagnostic_value(key)
+
+    def diagnostics(self) -> dict:
+        return {
+            "connection": {
+                "sidecar": self._sidecar,
+                "connected": self._writer is not None,
+                "deltas": self.deltas,
+            },
+            "available": self.available,
+            "tier_intervals": dict(self._tier_intervals),
+            "hub": self.stats.as_dict(),
+            "sidecar": dict(self._sidecar_stats),
+        }
+
+    async def async_run_link(self):
+        """Keep the link to the sidecar up until the hub is closed."""
+        while not self._closed:
+            try:
+                reader, self._writer = await ipc.open_link(self._sidecar)
+            except OSError as e:
+                _LOGGER.warning("Can't reach Recom sidecar at %s: %s", self._sidecar, e)
+            else:
+                _LOGGER.info("Connected to Recom sidecar at %s", self._sidecar)
+                self._configure()
+                try:
+                    while (message := await ipc.read_message(reader)) is not None:
+                        try:
+                            self._handle(message)
+                        except Exception:
+                            # One bad message must not take the link down
+                            _LOGGER.exception("Ignoring bad message from Recom sidecar: %.200s", message)
+                except (ConnectionError, ValueError) as e:
+                    _LOGGER.warning("Lost Recom sidecar link: %s", e)
+                finally:
+                    self._writer.close()
+                    self._writer = None
+                    for future in self._pending.values():
+                        if not future.done():
+                            future.set_result({})
+                    self._pending.clear()
+                    self._set_available(False)
+            await asyncio.sleep(SIDECAR_RECONNECT_SECONDS)
+
+    def _configure(self):
+        if self._writer is None or not self._entities:
+            return
+        self._writer.write(ipc.encode({
+            "op": ipc.OP_CONFIGURE,
+            **self._modbus,
+            "name": self._name,
+            "max_read_gap": self._max_read_gap,
+            "intervals": self._tier_intervals,
+            "force_refresh_cycles": self._force_refresh_cycles,
+            "verify_writes": self._verify_writes,
+            "points": [list(point) for point in self._points()],
+        }))
+
+    async def _async_configure(self, _now=None):
+        self._unsub_configure = None
+        self._configure()
+
+    def _handle(self, message):
+        op = message.get("op")
+        if op == ipc.OP_DELTA:
+            delta = {(table, address): value for table, address, value in message["values"]}
+            self.deltas += 1
+            self._sidecar_stats = message.get("stats", self._sidecar_stats)
+            self.apply_delta(delta, message["available"], message.get("forced", False))
+            self._notify_diagnostics()
+        elif op == ipc.OP_WRITTEN:
+            future = self._pending.pop(message["id"], None)
+            if future is not None and not future.done():
+                future.set_result({address: ok for address, ok in message["results"]})
+
+    def _set_available(self, available):
+        if self.available and not available:
+            self.stats.offline_trips += 1
+        super()._set_available(available)
+
+    async def _send_writes(self, table, values):
+        if self._writer is None:
+            return {address: False for address in values}
+        write_id = next(self._write_ids)
+        future = self._pending[write_id] = asyncio.get_running_loop().create_future()
+        self._writer.write(ipc.encode({
+            "op": ipc.OP_WRITE, "id": write_id, "table": table, "values": list(values.items()),
+        }))
+        results = await future
+        return {address: results.get(address, False) for address in values}
+
+    async def async_poll(self, names=None):
+        """Ask the sidecar to read the entities ``names`` (None = all) now; the delta follows."""
+        if self._writer is None:
+            return
+        message = {"op": ipc.OP_POLL}
+        if names is not None:
+            message["keys"] = [list(key) for key in self._keys_of(names)]
+        self._writer.write(ipc.encode(message))
+
+    def _start_polling(self):
+        """The sidecar polls; nothing to schedule here."""
+
+    def _stop_polling(self):
+        if self._unsub_configure is not None:
+            self._unsub_configure()
+            self._unsub_configure = None
+
+    def _entities_changed(self):
+        if self._unsub_configure is None:
+            self._unsub_configure = async_call_later(self._hass, CONFIGURE_DELAY_SECONDS, self._async_configure)
+
+    async def _close_transport(self):
+        self._closed = True
+        if self._writer is not None:
+            self._writer.close()
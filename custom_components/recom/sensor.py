@@ -1,5 +1,5 @@
 from homeassistant.core import callback
-from homeassistant.const import CONF_NAME
+from homeassistant.const import CONF_NAME, EntityCategory
 from homeassistant.helpers.entity import Entity
 
 from typing import Optional, Dict, Any
@@ -9,8 +9,16 @@ _LOGGER = logging.getLogger(__name__)
 from .const import (
     DOMAIN,
     SENSOR_TYPES,
-    ENTITY_SENSOR
+    SENSORS_DISABLED_BY_DEFAULT,
+    DIAGNOSTIC_TYPES,
+    DERIVED_SENSOR_TYPES,
+    ENTITY_SENSOR,
+    ENTITY_DIAGNOSTIC,
+    ENTITY_DERIVED,
+    DATA_TYPE_S16,
+    WORD_ORDER_BIG
 )
+from .core.decoder import compile_register_map
 
 
 async def async_setup_entry(hass, entry, async_add_entities):
@@ -25,27 +33,54 @@ async def async_setup_entry(hass, entry, async_add_entities):
 
 
     entities = []
-    for key, sensor_info in SENSOR_TYPES.items():
+    for spec in compile_register_map(SENSOR_TYPES, SENSORS_DISABLED_BY_DEFAULT):
         sensor = RecomSensor(
             hub_name,
             device_info,
             hub,
-            sensor_info[0],
-            key,
-            sensor_info[1],
-            sensor_info[2],
-            sensor_info[3],
-            sensor_info[4],
-            sensor_info[5]
-
+            spec.name,
+            spec.key,
+            spec.address,
+            spec.unit,
+            spec.divide_by,
+            spec.modbus_type,
+            spec.icon,
+            spec.poll_tier,
+            spec.data_type,
+            spec.word_order,
+            spec.bit,
+            spec.enabled_default
         )
         entities.append(sensor)
+    for key, derived_info in DERIVED_SENSOR_TYPES.items():
+        if key not in hub.derived_formulas:
+            continue
+        entities.append(RecomDerivedSensor(
+            hub_name,
+            device_info,
+            hub,
+            derived_info[0],
+            key,
+            derived_info[1],
+            derived_info[2],
+            [SENSOR_TYPES[input_key][0] for input_key in derived_info[3]]
+        ))
+    for key, diagnostic_info in DIAGNOSTIC_TYPES.items():
+        entities.append(RecomDiagnosticSensor(
+            hub_name,
+            device_info,
+            hub,
+            diagnostic_info[0],
+            key,
+            diagnostic_info[1],
+            diagnostic_info[2]
+        ))
     async_add_entities(entities)
     
     return True
 
 class RecomSensor(Entity):
-    def __init__(self, platform_name, device_info, hub, name, key, address, unit_of_measurement, divide_value_by, modbus_type, icon):
+    def __init__(self, platform_name, device_info, hub, name, key, address, unit_of_measurement, divide_value_by, modbus_type, icon, poll_tier, data_type=DATA_TYPE_S16, word_order=WORD_ORDER_BIG, bit=None, enabled_default=True):
         self._platform_name = platform_name
         self._state = None
         self._device_info = device_info
@@ -58,15 +93,24 @@ class RecomSensor(Entity):
         self._modbus_type = modbus_type
         self._entity_type = ENTITY_SENSOR
         self._icon = icon
+        self._poll_tier = poll_tier
+        self._data_type = data_type
+        self._word_order = word_order
+        self._bit = bit
+        self._attr_entity_registry_enabled_default = enabled_default
 
     async def async_added_to_hass(self):
         """Register callbacks."""
         self._hub.async_add_entity(self, self.update_callback)
 
+    async def async_will_remove_from_hass(self):
+        """Stop polling this entity's registers."""
+        self._hub.async_remove_entity(self)
+
 
     @callback
     def update_callback(self):
-        self._state = self._hub.data[self._name]
+        self._state = self._hub.data.get(self._name)
         self.async_write_ha_state()
 
     @property
@@ -89,6 +133,22 @@ class RecomSensor(Entity):
     def state(self):
         return self._state
 
+    @property
+    def available(self) -> bool:
+        return self._hub.available
+
+    @property
+    def extra_state_attributes(self) -> Optional[Dict[str, Any]]:
+        """Flag values restored from the last run until a poll confirms them."""
+        stale_since = self._hub.stale_since(self._name)
+        if stale_since is None:
+            return None
+        return {"restored": True, "last_polled": stale_since}
+
+    @property
+    def poll_tier(self):
+        return self._poll_tier
+
     @property
     def unit_of_measurement(self):
         return self._unit_of_measurement
@@ -97,6 +157,18 @@ class RecomSensor(Entity):
     def divide_value_by(self):
         return self._divide_value_by
 
+    @property
+    def data_type(self):
+        return self._data_type
+
+    @property
+    def word_order(self):
+        return self._word_order
+
+    @property
+    def bit(self):
+        return self._bit
+
     @property
     def unique_id(self):
         return self._name
@@ -116,4 +188,102 @@ class RecomSensor(Entity):
 
     @property
     def device_info(self) -> Optional[Dict[str, Any]]:
-        return self._device_info
\ No newline at end of file
+        return self._device_info
+
+
+class RecomDerivedSensor(Entity):
+    """Value the hub computes from other sensors of the same poll snapshot."""
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+
+    def __init__(self, platform_name, device_info, hub, name, key, unit_of_measurement, icon, inputs):
+        self._platform_name = platform_name
+        self._state = None
+        self._hub = hub
+        self._key = key
+        self._inputs = inputs
+        self._entity_type = ENTITY_DERIVED
+        self._attr_name = name
+        self._attr_unique_id = f"{platform_name}_{key}"
+        self._attr_device_info = device_info
+        self._attr_unit_of_measurement = unit_of_measurement
+        self._attr_icon = icon
+
+    async def async_added_to_hass(self):
+        """Register callbacks."""
+        self._hub.async_add_entity(self, self.update_callback)
+
+    async def async_will_remove_from_hass(self):
+        self._hub.async_remove_entity(self)
+
+    @callback
+    def update_callback(self):
+        self._state = self._hub.data.get(self.name)
+        self.async_write_ha_state()
+
+    @property
+    def entity_type(self):
+        return self._entity_type
+
+    @property
+    def key(self):
+        return self._key
+
+    @property
+    def inputs(self):
+        """Names of the sensors the value is computed from, in formula order."""
+        return self._inputs
+
+    @property
+    def state(self):
+        return self._state
+
+    @property
+    def available(self) -> bool:
+        return self._hub.available
+
+
+class RecomDiagnosticSensor(Entity):
+    """Hub statistic, refreshed after every poll cycle."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+
+    def __init__(self, platform_name, device_info, hub, name, key, unit_of_measurement, icon):
+        self._platform_name = platform_name
+        self._state = None
+        self._hub = hub
+        self._key = key
+        self._entity_type = ENTITY_DIAGNOSTIC
+        self._attr_name = name
+        self._attr_unique_id = f"{platform_name}_{key}"
+        self._attr_device_info = device_info
+        self._attr_unit_of_measurement = unit_of_measurement
+        self._attr_icon = icon
+
+    async def async_added_to_hass(self):
+        """Register callbacks."""
+        self._hub.async_add_entity(self, self.update_callback)
+
+    async def async_will_remove_from_hass(self):
+        """Stop receiving the hub's end of cycle updates."""
+        self._hub.async_remove_entity(self)
+
+    @callback
+    def update_callback(self):
+        value = self._hub.diagnostic_value(self._key)
+        if isinstance(value, float):
+            value = round(value, 1)
+        self._state = value
+        self.async_write_ha_state()
+
+    @property
+    def entity_type(self):
+        return self._entity_type
+
+    @property
+    def state(self):
+        return self._state
@@ -0,0 +1,5 @@
+"""Import the Home Assistant independent ``core`` package the way the sidecar does."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "custom_components", "recom"))
@@ -0,0 +1,109 @@
+import struct
+from types import SimpleNamespace
+
+from core.const import (
+    DATA_TYPE_F32,
+    DATA_TYPE_S32,
+    DATA_TYPE_U16,
+    MODBUS_COIL,
+    MODBUS_DISCRETE_INPUT,
+    MODBUS_HOLDING_REGISTER,
+    MODBUS_INPUT_REGISTER,
+    WORD_ORDER_LITTLE,
+)
+from core.decoder import BitPlan, DecodePlan, scaled_value
+from core.planner import ReadBlock
+
+
+def sensor(address, modbus_type=MODBUS_INPUT_REGISTER, divide_value_by=1, **kwargs):
+    return SimpleNamespace(address=address, modbus_type=modbus_type, divide_value_by=divide_value_by, **kwargs)
+
+
+def words(*values):
+    return memoryview(struct.pack(f">{len(values)}H", *values))
+
+
+def test_signed_values_are_scaled():
+    plan = DecodePlan([sensor(0, divide_value_by=10), sensor(2)], max_gap=8)
+    assert plan.reads == [("read_input_registers", ReadBlock(0, 3))]
+    raw, values = plan.decode([(words(0xFFF6, 0, 7), None)])
+    assert raw == [-10, 7]
+    assert values == [-1.0, 7.0]
+
+
+def test_bits_sharing_a_status_word_keep_the_whole_word_as_raw():
+    bit_a = sensor(50, data_type=DATA_TYPE_U16, bit=0)
+    bit_b = sensor(50, data_type=DATA_TYPE_U16, bit=1)
+    plan = DecodePlan([bit_a, bit_b], max_gap=0)
+    raw, values = plan.decode([(words(0b01), None)])
+    # One key per word, and both entities agree on its raw value
+    assert plan.keys == [(MODBUS_INPUT_REGISTER, 50), (MODBUS_INPUT_REGISTER, 50)]
+    assert raw == [1, 1]
+    assert values == [1.0, 0.0]
+    # Flipping only bit B changes the shared raw value
+    raw, values = plan.decode([(words(0b10), None)])
+    assert raw == [2, 2]
+    assert values == [0.0, 1.0]
+
+
+def test_32_bit_values_in_both_word_orders():
+    high_first = sensor(0, data_type=DATA_TYPE_S32)
+    low_first = sensor(2, data_type=DATA_TYPE_S32, word_order=WORD_ORDER_LITTLE)
+    plan = DecodePlan([high_first, low_first], max_gap=0)
+    assert plan.reads == [("read_input_registers", ReadBlock(0, 4))]
+    raw, _values = plan.decode([(words(0x0001, 0x0002, 0x0002, 0x0001), None)])
+    assert raw == [0x10002, 0x10002]
+
+
+def test_float_at_the_block_limit_decodes():
+    plan = DecodePlan([sensor(0), sensor(124, data_type=DATA_TYPE_F32)], max_gap=200)
+    assert plan.reads == [
+        ("read_input_registers", ReadBlock(0, 1)),
+        ("read_input_registers", ReadBlock(124, 2)),
+    ]
+    float_words = memoryview(struct.pack(">f", 1.5))
+    _raw, values = plan.decode([(words(5), None), (float_words, None)])
+    assert values == [5.0, 1.5]
+
+
+def test_values_with_missing_words_decode_to_none():
+    plan = DecodePlan([sensor(0), sensor(2, data_type=DATA_TYPE_S32)], max_gap=8)
+    raw, values = plan.decode([(words(1, 0, 0, 9), {0, 2})])
+    assert raw == [1, None]
+    assert values == [1.0, None]
+
+
+def test_failed_reads_decode_to_none():
+    plan = DecodePlan([sensor(0), sensor(1, MODBUS_HOLDING_REGISTER)], max_gap=8)
+    assert len(plan.reads) == 2
+    assert plan.decode([None, (words(3), None)]) == ([None, 3], [None, 3.0])
+
+
+def test_scaled_value():
+    assert scaled_value(None) is None
+    assert scaled_value(0b100, bit=2) == 1
+    assert scaled_value(215, divide_by=10) == 21.5
+
+
+class BitsResponse:
+    def __init__(self, bits):
+        self.bits = bits
+
+    def isError(self):
+        return False
+
+
+def test_bit_plan_reads_coils_and_discrete_inputs_in_bulk():
+    entities = [sensor(0, MODBUS_COIL), sensor(3, MODBUS_COIL), sensor(1, MODBUS_DISCRETE_INPUT)]
+    plan = BitPlan(entities)
+    assert plan.reads == [("read_coils", ReadBlock(0, 4)), ("read_discrete_inputs", ReadBlock(1, 1))]
+    values = plan.decode([BitsResponse([True, False, False, True]), None])
+    assert values == [True, True, None]
+
+
+def test_bit_plan_decodes_raw_pdus():
+    plan = BitPlan([sensor(0, MODBUS_COIL), sensor(9, MODBUS_COIL)])
+    response = BitsResponse(None)
+    # Function code, byte count, then the bits LSB first
+    response.pdu = bytes([1, 2, 0b00000001, 0b00000010])
+    assert plan.decode([response]) == [True, True]
@@ -0,0 +1,34 @@
+from core.derived import (
+    AIR_HEAT_W_PER_M3H_K,
+    derived_formulas,
+    fan_balance,
+    heat_recovery_efficiency,
+    recovered_heat_power,
+    temperature_difference,
+)
+
+
+def test_heat_recovery_efficiency():
+    assert heat_recovery_efficiency(0.0, 15.0, 20.0) == 75.0
+    # Extract and intake too close together to say anything
+    assert heat_recovery_efficiency(19.0, 19.5, 20.0) is None
+
+
+def test_temperature_difference_and_fan_balance():
+    assert temperature_difference(21.25, 18.0) == 3.2
+    assert fan_balance(1500, 1200) == 125.0
+    # Extract fan stopped
+    assert fan_balance(1500, 0) is None
+
+
+def test_recovered_heat_power_follows_the_fan_speed():
+    assert recovered_heat_power(0.0, 15.0, 1500, 100, 1500) == round(AIR_HEAT_W_PER_M3H_K * 100 * 15)
+    assert recovered_heat_power(0.0, 15.0, 750, 100, 1500) == round(AIR_HEAT_W_PER_M3H_K * 50 * 15)
+    # Without a reference speed the airflow is constant
+    assert recovered_heat_power(0.0, 15.0, 750, 100, 0) == round(AIR_HEAT_W_PER_M3H_K * 100 * 15)
+
+
+def test_recovered_heat_power_needs_an_airflow():
+    assert "recovered_heat_power" not in derived_formulas()
+    formula = derived_formulas(airflow=200, airflow_rpm=2000)["recovered_heat_power"]
+    assert formula(0.0, 10.0, 1000) == round(AIR_HEAT_W_PER_M3H_K * 100 * 10)
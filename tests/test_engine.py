@@ -0,0 +1,180 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+
+from core.connection import UnitNotResponding
+from core.const import MODBUS_COIL, MODBUS_HOLDING_REGISTER, MODBUS_INPUT_REGISTER
+from core.decoder import BitPlan, DecodePlan
+from core.engine import Point, RecomEngine, read_bit_blocks, read_register_blocks
+
+
+class Response:
+    def __init__(self, registers=None, bits=None, error=False):
+        self.registers = registers
+        self.bits = bits
+        self._error = error
+
+    def isError(self):
+        return self._error
+
+
+class FakeUnit:
+    """Answers reads from a table and rejects any read touching an unmapped address."""
+
+    def __init__(self, values, unmapped):
+        self.values = values
+        self.unmapped = unmapped
+        self.calls = []
+
+    async def call(self, method, address, count, **kwargs):
+        self.calls.append((method, address, count))
+        addresses = range(address, address + count)
+        if self.unmapped.intersection(addresses):
+            return Response(error=True)
+        values = [self.values[a] for a in addresses]
+        if method in ("read_coils", "read_discrete_inputs"):
+            return Response(bits=values)
+        return Response(registers=values)
+
+
+class FakeConnection:
+    """A unit that ignores writes, doesn't answer at all while ``down`` and
+    fails requests (without losing the connection) while ``failing``."""
+
+    def __init__(self, values):
+        self.unit = FakeUnit(values, unmapped=set())
+        self.down = False
+        self.failing = False
+        self.requests = 0
+
+    async def call_with_retry(self, method, *args, **kwargs):
+        self.requests += 1
+        if self.down:
+            raise UnitNotResponding("down")
+        if self.failing:
+            return None
+        if method.startswith("write"):
+            return Response()
+        return await self.unit.call(method, kwargs["address"], kwargs["count"])
+
+
+def engine_for(connection, points, max_read_gap=0, **kwargs):
+    deltas = []
+    # Every tier is due on every cycle
+    engine = RecomEngine(
+        connection, points, {"normal": 0}, max_read_gap, 1, lambda *delta: deltas.append(delta), **kwargs
+    )
+    return engine, deltas
+
+
+def point(address, modbus_type):
+    return SimpleNamespace(address=address, modbus_type=modbus_type, divide_value_by=1)
+
+
+def test_rejected_register_block_falls_back_to_single_reads():
+    unit = FakeUnit({0: 1, 1: 0, 2: 3}, unmapped={1})
+    plan = DecodePlan([point(0, MODBUS_INPUT_REGISTER), point(2, MODBUS_INPUT_REGISTER)], max_gap=8)
+    buffers = asyncio.run(read_register_blocks(unit.call, plan))
+    assert plan.decode(buffers)[0] == [1, 3]
+    assert unit.calls[1:] == [("read_input_registers", 0, 1), ("read_input_registers", 2, 1)]
+
+
+def test_rejected_bit_block_falls_back_to_single_reads():
+    unit = FakeUnit({0: True, 5: False, 9: True}, unmapped={3})
+    plan = BitPlan([point(0, MODBUS_COIL), point(5, MODBUS_COIL), point(9, MODBUS_COIL)])
+    responses = asyncio.run(read_bit_blocks(unit.call, plan))
+    assert plan.decode(responses) == [True, False, True]
+    assert unit.calls[1:] == [("read_coils", 0, 1), ("read_coils", 5, 1), ("read_coils", 9, 1)]
+
+
+def test_bits_without_an_answer_stay_unknown():
+    unit = FakeUnit({0: True}, unmapped={3, 5})
+    plan = BitPlan([point(0, MODBUS_COIL), point(5, MODBUS_COIL)])
+    assert plan.decode(asyncio.run(read_bit_blocks(unit.call, plan))) == [True, None]
+
+
+def test_rejected_block_is_split_for_later_cycles():
+    connection = FakeConnection({0: 1, 2: 3, 6: 6})
+    connection.unit.unmapped = {1}
+    points = [Point(MODBUS_INPUT_REGISTER, address, poll_tier="normal") for address in (0, 2, 6)]
+    engine, deltas = engine_for(connection, points, max_read_gap=8)
+
+    async def cycles():
+        await engine.cycle()
+        calls = len(connection.unit.calls)
+        await engine.cycle()
+        return connection.unit.calls[calls:]
+
+    second = asyncio.run(cycles())
+    assert deltas[0][0] == {
+        (MODBUS_INPUT_REGISTER, 0): 1, (MODBUS_INPUT_REGISTER, 2): 3, (MODBUS_INPUT_REGISTER, 6): 6
+    }
+    assert sorted(second) == [
+        ("read_input_registers", 0, 1), ("read_input_registers", 2, 1), ("read_input_registers", 6, 1)
+    ]
+
+
+def test_cycles_report_changes_and_forced_cycles_report_everything():
+    connection = FakeConnection({0: 180, 1: 190})
+    points = [Point(MODBUS_INPUT_REGISTER, address, poll_tier="normal") for address in (0, 1)]
+    engine, deltas = engine_for(connection, points, force_refresh_cycles=3)
+
+    async def cycles():
+        await engine.cycle()
+        connection.unit.values[1] = 191
+        await engine.cycle()
+        await engine.cycle()
+
+    asyncio.run(cycles())
+    assert deltas == [
+        ({(MODBUS_INPUT_REGISTER, 0): 180, (MODBUS_INPUT_REGISTER, 1): 190}, True, False),
+        ({(MODBUS_INPUT_REGISTER, 1): 191}, True, False),
+        ({(MODBUS_INPUT_REGISTER, 0): 180, (MODBUS_INPUT_REGISTER, 1): 191}, True, True),
+    ]
+    assert engine.stats.cycles == 3
+
+
+def test_writes_to_polled_points_are_verified(caplog):
+    connection = FakeConnection({5: 1})
+    engine, _deltas = engine_for(
+        connection, [Point(MODBUS_HOLDING_REGISTER, 5, poll_tier="normal")], verify_writes=True
+    )
+
+    async def write_and_poll():
+        await engine.write(MODBUS_HOLDING_REGISTER, {5: 2, 6: 3})
+        # Address 6 isn't polled, so nothing would ever confirm it
+        assert engine._unverified == {(MODBUS_HOLDING_REGISTER, 5): 2}
+        await engine.cycle()
+
+    with caplog.at_level(logging.WARNING):
+        asyncio.run(write_and_poll())
+    assert "wrote 2, unit reports 1" in caplog.text
+    assert engine._unverified == {}
+
+
+def test_unit_going_offline_opens_the_breaker():
+    connection = FakeConnection({0: 180})
+    engine, deltas = engine_for(connection, [Point(MODBUS_INPUT_REGISTER, 0, poll_tier="normal")])
+    connection.down = True
+
+    async def cycles():
+        await engine.cycle()
+        requests = connection.requests
+        # Backing off: no request until the probe is due
+        await engine.cycle()
+        assert connection.requests == requests
+
+    asyncio.run(cycles())
+    assert deltas == [({}, False, False)]
+    assert not engine.available
+    assert engine.stats.offline_trips == 1
+
+
+def test_failed_requests_keep_the_unit_online():
+    connection = FakeConnection({0: 180})
+    engine, deltas = engine_for(connection, [Point(MODBUS_INPUT_REGISTER, 0, poll_tier="normal")])
+    connection.failing = True
+    asyncio.run(engine.cycle())
+    assert deltas == [({(MODBUS_INPUT_REGISTER, 0): None}, True, False)]
+    assert engine.available
+    assert engine.stats.offline_trips == 0
@@ -0,0 +1,114 @@
+import asyncio
+import struct
+
+from core.connection import RecomModbusConnection, UnitNotResponding
+from core.pipeline import _MBAP
+
+TIMEOUT = 0.3
+
+
+class FakeGateway:
+    """Modbus TCP server answering holding register reads with their address.
+
+    ``delays`` holds one reply delay per address, used up by the first read;
+    units in ``silent`` never answer. A ``serial`` gateway drops any request
+    that arrives while it is still answering the previous one.
+    """
+
+    def __init__(self, delays=None, silent=(), serial=False):
+        self.delays = dict(delays or {})
+        self.silent = set(silent)
+        self.serial = serial
+        self.busy = False
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    def close(self):
+        self.server.close()
+
+    async def _serve(self, reader, writer):
+        try:
+            while True:
+                header = await reader.readexactly(_MBAP.size)
+                transaction_id, _protocol_id, length, unit = _MBAP.unpack(header)
+                pdu = await reader.readexactly(length - 1)
+                if unit in self.silent or (self.serial and self.busy):
+                    continue
+                function_code, address, count = struct.unpack(">BHH", pdu)
+                registers = range(address, address + count)
+                reply = struct.pack(f">BB{count}H", function_code, 2 * count, *registers)
+                self.busy = True
+                asyncio.get_running_loop().create_task(
+                    self._reply(writer, transaction_id, unit, reply, self.delays.pop(address, 0.01))
+                )
+        except (asyncio.CancelledError, asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+    async def _reply(self, writer, transaction_id, unit, pdu, delay):
+        await asyncio.sleep(delay)
+        self.busy = False
+        writer.write(_MBAP.pack(transaction_id, 0, len(pdu) + 1, unit) + pdu)
+
+
+async def _with_gateway(gateway, scenario):
+    port = await gateway.start()
+    connection = RecomModbusConnection("127.0.0.1", port, pipeline_window=4)
+    connection.pipeline._timeout = TIMEOUT
+    try:
+        return await scenario(connection)
+    finally:
+        await connection.close()
+        gateway.close()
+
+
+def _read(connection, address, unit=1):
+    return connection.call_with_retry("read_holding_registers", address=address, count=1, device_id=unit)
+
+
+def test_replies_are_matched_out_of_order():
+    async def scenario(connection):
+        return await asyncio.gather(*(_read(connection, a) for a in range(4)))
+
+    gateway = FakeGateway(delays={0: 0.15, 1: 0.1, 2: 0.05})
+    responses = asyncio.run(_with_gateway(gateway, scenario))
+    assert [r.registers for r in responses] == [[0], [1], [2], [3]]
+
+
+def test_late_reply_to_timed_out_request_keeps_pipelining():
+    async def scenario(connection):
+        first = await _read(connection, 7)
+        # Let the late reply to the timed-out attempt arrive
+        await asyncio.sleep(0.4)
+        second = await _read(connection, 8)
+        return first, second, connection.pipeline
+
+    gateway = FakeGateway(delays={7: 0.5})
+    first, second, pipeline = asyncio.run(_with_gateway(gateway, scenario))
+    assert first.registers == [7]
+    assert second.registers == [8]
+    assert pipeline is not None
+
+
+def test_silent_unit_does_not_disable_pipelining():
+    async def scenario(connection):
+        silent = await asyncio.gather(*(_read(connection, a, unit=2) for a in range(4)), return_exceptions=True)
+        answered = await _read(connection, 5)
+        return silent, answered, connection.pipeline
+
+    silent, answered, pipeline = asyncio.run(_with_gateway(FakeGateway(silent={2}), scenario))
+    assert all(isinstance(error, UnitNotResponding) for error in silent)
+    assert answered.registers == [5]
+    assert pipeline is not None
+
+
+def test_peer_skipping_pipelined_requests_falls_back_to_serial():
+    async def scenario(connection):
+        responses = await asyncio.gather(*(_read(connection, a) for a in range(4)))
+        return responses, connection.pipeline
+
+    responses, pipeline = asyncio.run(_with_gateway(FakeGateway(serial=True), scenario))
+    assert pipeline is None
+    assert [r.registers for r in responses] == [[0], [1], [2], [3]]
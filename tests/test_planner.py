@@ -0,0 +1,45 @@
+from core.planner import MAX_REGISTERS_PER_READ, ReadBlock, plan_reads, plan_writes, WriteBlock
+
+
+def test_contiguous_addresses_make_one_block():
+    assert plan_reads([3, 1, 2, 2]) == [ReadBlock(1, 3)]
+
+
+def test_gaps_up_to_max_gap_are_bridged():
+    assert plan_reads([0, 4], max_gap=3) == [ReadBlock(0, 5)]
+    assert plan_reads([0, 5], max_gap=3) == [ReadBlock(0, 1), ReadBlock(5, 1)]
+
+
+def test_blocks_stay_within_max_count():
+    blocks = plan_reads(range(300))
+    assert [block.count for block in blocks] == [MAX_REGISTERS_PER_READ, MAX_REGISTERS_PER_READ, 50]
+
+
+def test_multi_register_value_never_straddles_a_block():
+    # A 32-bit value at 124 would end at register 125, one past the limit
+    blocks = plan_reads([0, 124], widths={124: 2})
+    assert blocks == [ReadBlock(0, 1), ReadBlock(124, 2)]
+
+
+def test_width_extends_the_block_end():
+    assert plan_reads([10, 14], max_gap=2, widths={10: 2}) == [ReadBlock(10, 5)]
+    assert plan_reads([10], widths={10: 2}) == [ReadBlock(10, 2)]
+
+
+def test_overlapping_values_share_a_block():
+    assert plan_reads([10, 11], widths={10: 2}) == [ReadBlock(10, 2)]
+
+
+def test_unmapped_addresses_are_never_bridged():
+    assert plan_reads([0, 2, 6], max_gap=8, unmapped=[4]) == [ReadBlock(0, 3), ReadBlock(6, 1)]
+    # A requested address the unit rejects is read on its own
+    assert plan_reads([0, 1, 2], unmapped=[1]) == [ReadBlock(0, 1), ReadBlock(1, 1), ReadBlock(2, 1)]
+
+
+def test_writes_only_merge_consecutive_addresses():
+    assert plan_writes({2: 5, 3: 6, 5: 7}) == [WriteBlock(2, (5, 6)), WriteBlock(5, (7,))]
+
+
+def test_writes_split_at_max_count():
+    blocks = plan_writes({address: address for address in range(5)}, max_count=2)
+    assert [block.start for block in blocks] == [0, 2, 4]
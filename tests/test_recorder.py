@@ -0,0 +1,79 @@
+import asyncio
+import struct
+
+import pytest
+
+from core.connection import UnitNotResponding
+from core.const import MODBUS_COIL, MODBUS_HOLDING_REGISTER, MODBUS_INPUT_REGISTER
+from core.engine import Point, RecomEngine
+from core.pipeline import FC_READ_COILS, FC_READ_HOLDING_REGISTERS, FC_READ_INPUT_REGISTERS, PipelinedResponse
+from core.recorder import ReplayConnection, TrafficRecorder, load_records
+
+READS = {
+    "read_input_registers": FC_READ_INPUT_REGISTERS,
+    "read_holding_registers": FC_READ_HOLDING_REGISTERS,
+    "read_coils": FC_READ_COILS,
+}
+
+
+class FakeConnection:
+    """Answers register reads with the address plus 100, coil reads with alternating bits and
+    fails holding register reads."""
+
+    async def call_with_retry(self, method, *args, address=0, count=1, **kwargs):
+        function_code = READS[method]
+        if function_code == FC_READ_HOLDING_REGISTERS:
+            return None
+        if function_code == FC_READ_COILS:
+            bits = sum(1 << offset for offset in range(0, count, 2))
+            pdu = struct.pack(">BBB", function_code, 1, bits)
+        else:
+            registers = [address + offset + 100 for offset in range(count)]
+            pdu = struct.pack(f">BB{count}H", function_code, 2 * count, *registers)
+        return PipelinedResponse(function_code, pdu, count)
+
+
+POINTS = [
+    Point(MODBUS_INPUT_REGISTER, 0, poll_tier="normal"),
+    Point(MODBUS_INPUT_REGISTER, 1, poll_tier="normal"),
+    Point(MODBUS_HOLDING_REGISTER, 17, poll_tier="normal"),
+    Point(MODBUS_COIL, 0, poll_tier="normal"),
+    Point(MODBUS_COIL, 1, poll_tier="normal"),
+]
+
+
+def _poll(connection, recorder=None):
+    deltas = []
+    engine = RecomEngine(
+        connection, POINTS, {"normal": 0}, 0, 1, lambda *delta: deltas.append(delta), recorder=recorder
+    )
+    asyncio.run(engine.cycle())
+    return deltas
+
+
+def test_recorded_session_replays_the_same_values(tmp_path):
+    path = str(tmp_path / "traffic.jsonl")
+    recorder = TrafficRecorder(path, max_bytes=1 << 20, backup_count=1)
+    recorded = _poll(FakeConnection(), recorder)
+    recorder.flush()
+
+    records = load_records(path)
+    assert {record["fc"] for record in records} == set(READS.values())
+    assert [record["error"] for record in records if "error" in record] == ["failed"]
+
+    replay = ReplayConnection(records, speed=0)
+    assert _poll(replay) == recorded
+    assert recorded[0][0][(MODBUS_INPUT_REGISTER, 1)] == 101
+    assert recorded[0][0][(MODBUS_HOLDING_REGISTER, 17)] is None
+    assert replay.unmatched == 0
+
+
+def test_lost_unit_replays_as_not_responding(tmp_path):
+    path = str(tmp_path / "traffic.jsonl")
+    recorder = TrafficRecorder(path, max_bytes=1 << 20, backup_count=1)
+    recorder.record("read_input_registers", (), {"address": 3, "count": 1}, None, 5000.0, lost=True)
+    recorder.flush()
+
+    replay = ReplayConnection(load_records(path), speed=0)
+    with pytest.raises(UnitNotResponding):
+        asyncio.run(replay.call_with_retry("read_input_registers", address=3, count=1))
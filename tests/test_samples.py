@@ -0,0 +1,28 @@
+import pytest
+
+from core.samples import SampleRing
+
+
+def test_ring_keeps_the_newest_samples_once_full():
+    ring = SampleRing(3)
+    for second in range(5):
+        ring.append(float(second), second * 10.0)
+    assert len(ring) == 3
+    assert ring.samples() == [[2.0, 20.0], [3.0, 30.0], [4.0, 40.0]]
+    assert ring.samples(since=3.0) == [[3.0, 30.0], [4.0, 40.0]]
+
+
+def test_aggregate_covers_a_half_open_window():
+    ring = SampleRing(4)
+    for second, value in enumerate((19.5, 20.5, 21.0, 18.0, 22.0)):
+        ring.append(float(second), value)
+    # Slot of the first sample was overwritten; 4.0 lies outside [1, 4)
+    assert ring.aggregate(1.0, 4.0) == (18.0, pytest.approx(59.5 / 3), 21.0, 3)
+    assert ring.aggregate(10.0, 20.0) is None
+
+
+def test_empty_ring():
+    ring = SampleRing(2)
+    assert len(ring) == 0
+    assert ring.samples() == []
+    assert ring.aggregate(0.0, 1.0) is None